@@ -0,0 +1,71 @@
+"""
+Microbenchmark: date-range filter on a synthetic 1M-row frame.
+
+Compares the old `.dt.date` comparison (Python date objects), a native datetime64
+comparison and the binary search on the sorted posisi index (DateIndex).
+
+Run from the repository root:
+    python benchmarks/bench_date_filter.py
+"""
+import datetime
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+from time_axis import DateIndex, date_bounds
+
+N_ROWS = 1_000_000
+
+
+def timeit(fn, repeat: int = 5) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    quarter_ends = pd.date_range("1990-03-31", periods=160, freq="Q")
+    df = pd.DataFrame({"posisi": quarter_ends[rng.integers(0, len(quarter_ends), N_ROWS)]})
+
+    start_date = datetime.date(2005, 1, 1)
+    end_date = datetime.date(2015, 12, 31)
+
+    def dt_date():
+        return ((df["posisi"].dt.date >= start_date) & (df["posisi"].dt.date <= end_date)).to_numpy()
+
+    def datetime64():
+        low, high = date_bounds(start_date, end_date)
+        posisi = df["posisi"].to_numpy()
+        return (posisi >= low) & (posisi <= high)
+
+    build_start = time.perf_counter()
+    index = DateIndex(df["posisi"].to_numpy())
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    assert (dt_date() == datetime64()).all()
+    assert (dt_date() == index.mask(start_date, end_date)).all()
+
+    old_ms = timeit(dt_date, repeat=3)
+    native_ms = timeit(datetime64)
+    mask_ms = timeit(lambda: index.mask(start_date, end_date))
+    rows_ms = timeit(lambda: index.rows(start_date, end_date))
+
+    print(f"rows                          : {N_ROWS:,}")
+    print(f".dt.date comparison           : {old_ms:8.1f} ms")
+    print(f"datetime64 comparison         : {native_ms:8.1f} ms")
+    print(f"DateIndex build (once)        : {build_ms:8.1f} ms")
+    print(f"DateIndex.mask (searchsorted) : {mask_ms:8.1f} ms")
+    print(f"DateIndex.rows (searchsorted) : {rows_ms:8.1f} ms")
@@ -0,0 +1,96 @@
+"""
+Benchmark: QoQ / YoY changes and trailing 4-quarter mean / volatility on a synthetic
+banking universe (120 banks, 40 quarters, 10 ratios like import_fitur_rasio).
+
+Compares a per-company loop (sort each bank by quarter, shift and roll) with the
+vectorized computation over all banks and features, and a full materialization of the
+dataset with the update after one appended quarter.
+
+Run from the repository root:
+    python benchmarks/bench_derived.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+import statement_store
+from derived_metrics import compute_derived, materialize_derived
+from statement_store import append_part, read_store
+
+N_BANKS = 120
+N_QUARTERS = 40
+N_FEATURES = 10
+KEYS = ["company_name", "kbmi_type", "year", "year_quarter", "company_date"]
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_rasio() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    posisi = pd.date_range("2015-03-31", periods=N_QUARTERS, freq="Q")
+    banks = [f"Bank {i:03d}" for i in range(N_BANKS)]
+    df = pd.DataFrame({
+        "posisi": np.tile(posisi, N_BANKS),
+        "company_name": np.repeat(banks, N_QUARTERS),
+        "kbmi_type": np.repeat([f"KBMI {1 + i % 4}" for i in range(N_BANKS)], N_QUARTERS),
+    })
+    features = pd.DataFrame(rng.normal(0.05, 0.02, (len(df), N_FEATURES)),
+                            columns=[f"feature_{i:03d}" for i in range(N_FEATURES)])
+    df = pd.concat([df, features], axis=1)
+    df["year"] = df["posisi"].dt.year
+    df["quarter"] = "q" + df["posisi"].dt.quarter.astype(str)
+    df["year_quarter"] = df["year"].astype(str) + "_" + df["quarter"]
+    df["company_date"] = df["company_name"] + "_" + df["year"].astype(str) + df["quarter"]
+    # Shuffled, like rows appended by several ingestions
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def per_company(df: pd.DataFrame, features: list) -> pd.DataFrame:
+    """
+    One bank at a time: sort by quarter, then shift and roll every feature
+    """
+    frames = []
+    for company in df["company_name"].unique():
+        block = df[df["company_name"] == company].sort_values("year_quarter")
+        out = block[KEYS].copy()
+        for feature in features:
+            out[f"{feature}__qoq"] = block[feature].diff()
+            out[f"{feature}__yoy"] = block[feature].diff(4)
+            out[f"{feature}__mean_4q"] = block[feature].rolling(4).mean()
+            out[f"{feature}__std_4q"] = block[feature].rolling(4).std()
+        frames.append(out)
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    features = [f"feature_{i:03d}" for i in range(N_FEATURES)]
+    df = synthetic_rasio()[KEYS + features]
+
+    print(f"per-company loop                : {timeit(lambda: per_company(df, features)):8.1f} ms")
+    print(f"vectorized, all banks           : {timeit(lambda: compute_derived(df, features)):8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        statement_store.STORE_DIR = Path(tmp)
+        append_part("rasio", df[df["year_quarter"] != "2024_q4"])
+        load = lambda years: read_store("rasio", columns=KEYS + features, year=years)
+        print(f"materialize, all quarters       : {timeit(lambda: materialize_derived(load, features), repeat=1):8.1f} ms")
+
+        append_part("rasio", df[df["year_quarter"] == "2024_q4"])
+        print(f"materialize, one new quarter    : {timeit(lambda: materialize_derived(load, features, ['2024_q4']), repeat=1):8.1f} ms")
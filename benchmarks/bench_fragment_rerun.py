@@ -0,0 +1,110 @@
+"""
+Benchmark: latency of one widget interaction on a page served by a real Streamlit
+server, measured over its websocket like the browser does: time from the rerun request
+(with the changed widget state) to the "script finished" message.
+
+A page whose chart blocks are fragments only reruns the block of the changed widget;
+otherwise the whole script reruns. Compare with an older version of a page by running
+this script on a copy of it (kept next to the original so its imports resolve).
+
+Run from the repository root:
+    python benchmarks/bench_fragment_rerun.py
+    python benchmarks/bench_fragment_rerun.py pages/percentage/overtime_single_bank_check_page_percentage.py --widget company_select_2
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+DEFAULT_PAGE = "pages/percentage/overtime_multiple_bank_check_page_percentage.py"
+DEFAULT_WIDGET = "feature_selector_1"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def rerun(conn, widget=None, value=None, fragment_id="") -> tuple:
+    """
+    Request a rerun, wait for the end of the script. Returns (seconds, widgets seen)
+    where widgets maps a widget key to (element, fragment id)
+    """
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    if widget is not None:
+        state = msg.rerun_script.widget_states.widgets.add()
+        state.id = widget
+        state.string_value = value
+    msg.rerun_script.fragment_id = fragment_id
+
+    widgets = {}
+    start = time.perf_counter()
+    await conn.write_message(msg.SerializeToString(), binary=True)
+    while True:
+        forward = ForwardMsg()
+        forward.ParseFromString(await conn.read_message())
+        kind = forward.WhichOneof("type")
+        if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+            element = forward.delta.new_element
+            widget_proto = getattr(element, element.WhichOneof("type"))
+            if getattr(widget_proto, "id", ""):
+                widgets[widget_proto.id.split("-", 2)[-1]] = (widget_proto, forward.delta.fragment_id)
+        if kind == "script_finished":
+            return time.perf_counter() - start, widgets
+
+
+async def measure(port: int, widget_key: str, rounds: int) -> list:
+    for _ in range(200):
+        try:
+            conn = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"])
+            break
+        except OSError:
+            await asyncio.sleep(0.2)
+
+    # First run loads the data and lists the widgets of the page
+    _, widgets = await rerun(conn)
+    element, fragment_id = widgets[widget_key]
+    options = list(element.options)
+
+    # First pass over the options builds every figure (cold), the next ones are served
+    # from the figure cache: what remains is the cost of rerunning the script or the fragment
+    cold, warm = [], []
+    for i in range(len(options) + rounds):
+        value = options[(i + 1) % len(options)]
+        seconds, _ = await rerun(conn, element.id, value, fragment_id)
+        (cold if i < len(options) else warm).append(seconds * 1000)
+    conn.close()
+    return cold, warm
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("page", nargs="?", default=DEFAULT_PAGE)
+    parser.add_argument("--widget", default=DEFAULT_WIDGET, help="key of the selectbox to change")
+    parser.add_argument("--rounds", type=int, default=30, help="interactions measured after the first pass")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.page, "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        cold, warm = asyncio.run(measure(port, args.widget, args.rounds))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.page} / {args.widget}")
+    for name, latencies in [("new figure", cold), ("cached figure", warm)]:
+        print(f"  {name:<14}: median {statistics.median(latencies):8.1f} ms   min {min(latencies):8.1f} ms   ({len(latencies)} interactions)")
@@ -0,0 +1,45 @@
+"""
+Benchmark: cold Excel load vs reads of the partitioned Parquet dataset by import_rasio()
+(full read, and one feature of one KBMI with column + partition pruning).
+
+Run from the repository root:
+    python benchmarks/bench_import_rasio.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+from import_data import RASIO_FILES, import_rasio, read_rasio_excel
+from statement_store import seed_store
+
+
+def timeit(fn, repeat: int = 5) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    cold_ms = timeit(read_rasio_excel)
+
+    # Seeding writes the dataset from the workbooks, the next reads are served from it
+    start = time.perf_counter()
+    seed_store("rasio", RASIO_FILES, read_rasio_excel)
+    build_ms = (time.perf_counter() - start) * 1000
+    warm_ms = timeit(import_rasio)
+    pruned_ms = timeit(lambda: import_rasio(columns=["posisi", "company_name", "npl_gross"], kbmi_type="KBMI 4"))
+
+    print(f"cold excel load    : {cold_ms:8.1f} ms")
+    print(f"dataset seed       : {build_ms:8.1f} ms")
+    print(f"full dataset read  : {warm_ms:8.1f} ms")
+    print(f"pruned read        : {pruned_ms:8.1f} ms")
+    print(f"speedup            : {cold_ms / warm_ms:8.1f}x")
@@ -0,0 +1,74 @@
+"""
+Microbenchmark: merging wrapped label rows of extracted statement tables.
+
+Compares the previous row-by-row merge_2_rows (iloc per cell, list membership checks)
+with the vectorized merge_next_rows engine on a year of synthetic tables
+(4 quarters x 3 statements x 40 banks, 60 rows x 4 columns each).
+
+Run from the repository root:
+    python benchmarks/bench_merge_rows.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from data_extractor.extractor.merge import merge_next_rows, normalize_text
+
+N_TABLES = 4 * 3 * 40
+N_ROWS = 60
+N_COLS = 4
+LABELS = ["Aset produktif bermasalah dan aset", "Cadangan Kerugian Penurunan Nilai", "Kewajiban Penyediaan Modal"]
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def legacy_merge_2_rows(df, two_row_list, col_index=1):
+    # The loop merge_2_rows used before the merge engine
+    normalized_list = [normalize_text(item) for item in two_row_list]
+    rows_to_drop = []
+    for i in range(len(df)):
+        if i in rows_to_drop:
+            continue
+        current_val = normalize_text(df.iloc[i, col_index])
+        if current_val in normalized_list and i + 2 < len(df):
+            for col in df.columns:
+                vals = [str(df.iloc[i + k, col]).strip() for k in range(3)]
+                df.iat[i, col] = " ".join([v for v in vals if v])
+            rows_to_drop.extend([i + 1, i + 2])
+    return df.drop(rows_to_drop).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    words = np.array(["Kredit", "yang", "diberikan", "1,234", "(56)", "-", ""], dtype=object)
+    tables = []
+    for _ in range(N_TABLES):
+        cells = rng.choice(words, (N_ROWS, N_COLS))
+        cells[rng.choice(N_ROWS, 6, replace=False), 1] = rng.choice(LABELS, 6)
+        tables.append(pd.DataFrame(cells))
+
+    legacy = [legacy_merge_2_rows(df.copy(), LABELS) for df in tables]
+    engine = [merge_next_rows(df, {label: 2 for label in LABELS}) for df in tables]
+    assert all(a.equals(b) for a, b in zip(legacy, engine))
+
+    legacy_ms = timeit(lambda: [legacy_merge_2_rows(df.copy(), LABELS) for df in tables], repeat=1)
+    engine_ms = timeit(lambda: [merge_next_rows(df, {label: 2 for label in LABELS}) for df in tables])
+
+    print(f"tables                        : {N_TABLES} x {N_ROWS} rows")
+    print(f"row-by-row merge_2_rows       : {legacy_ms:8.1f} ms")
+    print(f"merge_next_rows (vectorized)  : {engine_ms:8.1f} ms")
@@ -0,0 +1,87 @@
+"""
+Benchmark: memory and page queries of the shared store frame vs the dense
+(company x period x feature) float32 cube, on a synthetic banking universe
+(120 banks, 40 quarters, 10 ratios like import_fitur_rasio).
+
+Run from the repository root:
+    python benchmarks/bench_panel_cube.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+from data_store import RasioStore
+from import_data import normalize_rasio
+from panel_cube import PanelCube
+
+N_BANKS = 120
+N_QUARTERS = 40
+N_FEATURES = 10
+
+
+def timeit(fn, repeat: int = 50) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_rasio() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    posisi = pd.date_range("2015-03-31", periods=N_QUARTERS, freq="Q")
+    banks = [f"Bank {i:03d}" for i in range(N_BANKS)]
+    df = pd.DataFrame({
+        "posisi": np.tile(posisi, N_BANKS),
+        "company_name": np.repeat(banks, N_QUARTERS),
+        "kbmi_type": np.repeat([f"KBMI {1 + i % 4}" for i in range(N_BANKS)], N_QUARTERS),
+    })
+    features = pd.DataFrame(rng.normal(0.05, 0.02, (len(df), N_FEATURES)),
+                            columns=[f"feature_{i:03d}" for i in range(N_FEATURES)])
+    df = pd.concat([df, features], axis=1)
+    df["year_quarter"] = df["posisi"].dt.year.astype(str) + "_q" + df["posisi"].dt.quarter.astype(str)
+    df["company_date"] = df["company_name"] + "_" + df["year_quarter"].str.replace("_", "")
+    return normalize_rasio(df)
+
+
+if __name__ == "__main__":
+    features = [f"feature_{i:03d}" for i in range(N_FEATURES)]
+    store = RasioStore(synthetic_rasio())
+    cube = PanelCube(store.frame, features)
+
+    frame_kib = store.frame.memory_usage(index=True, deep=True).sum() / 1024
+    print(f"store frame                     : {frame_kib:8.1f} KiB")
+    print(f"cube (values + masks)           : {cube.nbytes / 1024:8.1f} KiB")
+
+    bank, feature, quarter = "Bank 042", "feature_003", "2020_q2"
+    year, q = 2020, 2
+    queries = {
+        "one bank over time": (
+            lambda: store.take(store.company_rows(bank), columns=[feature])[feature].to_numpy(),
+            lambda: cube.series(bank, feature),
+        ),
+        "one feature, every bank": (
+            lambda: store.frame[["company_name", "year_quarter", feature]].pivot(index="company_name", columns="year_quarter", values=feature).to_numpy(),
+            lambda: cube.feature(feature),
+        ),
+        "one quarter cross-section": (
+            lambda: store.take(store.filters.rows(year=[year], quarter=[q]), columns=features)[features].to_numpy(),
+            lambda: cube.quarter(quarter),
+        ),
+        "one bank, px.line input": (
+            lambda: store.take(store.company_rows(bank), columns=[feature]),
+            lambda: cube.series_frame(bank, [feature]),
+        ),
+    }
+    for name, (frame_query, cube_query) in queries.items():
+        print(f"{name:<32}: frame {timeit(frame_query):8.4f} ms   cube {timeit(cube_query):8.4f} ms")
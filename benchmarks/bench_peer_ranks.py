@@ -0,0 +1,90 @@
+"""
+Benchmark: peer position of one bank on a synthetic banking universe (120 banks,
+40 quarters, 10 ratios like import_fitur_rasio) written as a partitioned dataset in a temporary folder.
+
+Times the materialization (all quarters, then one appended quarter) and compares ranking
+a bank's KBMI peers ad hoc (groupby rank / z-score on the loaded ratios) with a lookup
+in the loaded cube.
+
+Run from the repository root:
+    python benchmarks/bench_peer_ranks.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+import statement_store
+from peer_ranks import PEER_STATEMENT, materialize_peer_ranks, peer_columns
+from statement_store import append_part, read_store
+
+N_BANKS = 120
+N_QUARTERS = 40
+N_FEATURES = 10
+KEYS = ["company_name", "kbmi_type", "year", "year_quarter", "company_date"]
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_rasio() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    posisi = pd.date_range("2015-03-31", periods=N_QUARTERS, freq="Q")
+    banks = [f"Bank {i:03d}" for i in range(N_BANKS)]
+    df = pd.DataFrame({
+        "posisi": np.tile(posisi, N_BANKS),
+        "company_name": np.repeat(banks, N_QUARTERS),
+        "kbmi_type": np.repeat([f"KBMI {1 + i % 4}" for i in range(N_BANKS)], N_QUARTERS),
+    })
+    features = pd.DataFrame(rng.normal(0.05, 0.02, (len(df), N_FEATURES)),
+                            columns=[f"feature_{i:03d}" for i in range(N_FEATURES)])
+    df = pd.concat([df, features], axis=1)
+    df["year"] = df["posisi"].dt.year
+    df["quarter"] = "q" + df["posisi"].dt.quarter.astype(str)
+    df["year_quarter"] = df["year"].astype(str) + "_" + df["quarter"]
+    df["company_date"] = df["company_name"] + "_" + df["year"].astype(str) + df["quarter"]
+    return df
+
+
+if __name__ == "__main__":
+    features = [f"feature_{i:03d}" for i in range(N_FEATURES)]
+    with tempfile.TemporaryDirectory() as tmp:
+        statement_store.STORE_DIR = Path(tmp)
+        append_part("rasio", synthetic_rasio())
+        load = lambda years: read_store("rasio", columns=KEYS + features, year=years)
+
+        raw = load(None)
+        columns = KEYS + peer_columns(["feature_004"], scopes=["kbmi"])
+
+        def ad_hoc():
+            # Rank the bank's KBMI peers of every quarter on the loaded ratios
+            groups = raw.groupby(["year_quarter", "kbmi_type"])["feature_004"]
+            position = pd.DataFrame({
+                "rank": groups.rank(method="min"),
+                "percentile": groups.rank(method="max", pct=True),
+                "zscore": (raw["feature_004"] - groups.transform("mean")) / groups.transform("std"),
+            })
+            return position[raw["company_name"] == "Bank 007"]
+
+        print(f"materialize, all quarters       : {timeit(lambda: materialize_peer_ranks(load, features), repeat=1):8.1f} ms")
+        print(f"materialize, one new quarter    : {timeit(lambda: materialize_peer_ranks(load, features, ['2024_q4'])):8.1f} ms")
+        cube = read_store(PEER_STATEMENT, columns=columns)
+        lookup = lambda: cube.loc[cube["company_name"] == "Bank 007", columns]
+
+        print(f"peer position, ad hoc           : {timeit(ad_hoc):8.2f} ms")
+        print(f"peer position, cube lookup      : {timeit(lookup):8.2f} ms")
@@ -0,0 +1,43 @@
+"""
+Benchmark: memory and load time of the shared Rasio store, every column up front
+(the old behaviour) vs key columns up front and features loaded on first use.
+
+Run from the repository root:
+    python benchmarks/bench_projection.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+from data_store import RasioStore
+from import_data import import_rasio, import_rasio_normalized
+
+
+def frame_kib(df) -> float:
+    return df.memory_usage(index=True, deep=True).sum() / 1024
+
+
+if __name__ == "__main__":
+    # Warm the dataset (first use seeds it from the workbooks)
+    import_rasio()
+
+    start = time.perf_counter()
+    full = RasioStore(import_rasio_normalized())
+    full_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    lazy = RasioStore(import_rasio_normalized(columns=[]), load_columns=import_rasio)
+    lazy_ms = (time.perf_counter() - start) * 1000
+    lazy_keys_kib = frame_kib(lazy.frame)
+
+    # One page: the single feature page uses five features
+    start = time.perf_counter()
+    lazy.ensure(["npl_gross", "npl_net", "return_on_asset", "return_on_equity", "net_interest_margin"])
+    ensure_ms = (time.perf_counter() - start) * 1000
+
+    print(f"full store      : {full_ms:8.1f} ms  {frame_kib(full.frame):8.1f} KiB  ({full.frame.shape[1]} columns)")
+    print(f"lazy store      : {lazy_ms:8.1f} ms  {lazy_keys_kib:8.1f} KiB  ({len(lazy.key_columns)} key columns)")
+    print(f"+ 5 features    : {ensure_ms:8.1f} ms  {frame_kib(lazy.frame):8.1f} KiB  ({lazy.frame.shape[1]} columns)")
@@ -0,0 +1,114 @@
+"""
+Benchmark: filter + aggregate queries on a synthetic banking universe (120 banks,
+40 quarters, 300 line items) written as a partitioned dataset in a temporary folder.
+
+Compares materializing the whole frame in pandas with query_rasio on the pandas
+backend (pruned read) and on DuckDB (when installed), after checking that both backends
+return the same result for every aggregation.
+
+Run from the repository root:
+    python benchmarks/bench_query.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+import statement_store
+from query_engine import AGGREGATIONS, duckdb_available, run_query
+from statement_store import append_part, read_store
+
+N_BANKS = 120
+N_QUARTERS = 40
+N_FEATURES = 300
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_rasio() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    posisi = pd.date_range("2015-03-31", periods=N_QUARTERS, freq="Q")
+    banks = [f"Bank {i:03d}" for i in range(N_BANKS)]
+    df = pd.DataFrame({
+        "posisi": np.tile(posisi, N_BANKS),
+        "company_name": np.repeat(banks, N_QUARTERS),
+        "kbmi_type": np.repeat([f"KBMI {1 + i % 4}" for i in range(N_BANKS)], N_QUARTERS),
+    })
+    # Rounded to 4 decimals like the published ratios, so values fall exactly on bin edges
+    features = pd.DataFrame(rng.normal(0.05, 0.02, (len(df), N_FEATURES)).round(4),
+                            columns=[f"feature_{i:03d}" for i in range(N_FEATURES)])
+    df = pd.concat([df, features], axis=1)
+    df["year"] = df["posisi"].dt.year
+    df["quarter"] = "q" + df["posisi"].dt.quarter.astype(str)
+    df["year_quarter"] = df["year"].astype(str) + "_" + df["quarter"]
+    df["company_date"] = df["company_name"] + "_" + df["year"].astype(str) + df["quarter"]
+    return df
+
+
+def load(columns, kbmi_type, years):
+    return read_store("rasio", columns=columns, kbmi_type=kbmi_type, year=years)
+
+
+def check_parity() -> int:
+    """
+    Same result on the pandas and DuckDB backends for every aggregation and a few filter
+    combinations; returns the number of queries compared
+    """
+    options = [
+        dict(),
+        dict(kbmi_type="KBMI 4"),
+        dict(by="company_name", kbmi_type="KBMI 2", years=[2020, 2021]),
+        dict(by="year_quarter", quarters=[1, 4]),
+        dict(by="year_quarter", bins=7, start_date="2018-01-01", end_date="2019-12-31"),
+    ]
+    compared = 0
+    for feature in ["feature_000", "feature_042", "feature_299"]:
+        for agg in AGGREGATIONS:
+            for option in options:
+                if agg == "series" and "by" in option:
+                    continue
+                expected = run_query("rasio", load, feature, agg, backend="pandas", **option)
+                result = run_query("rasio", load, feature, agg, backend="duckdb", **option)
+                pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True),
+                                              check_dtype=False, check_index_type=False, check_categorical=False,
+                                              obj=f"{agg} {feature} {option}")
+                compared += 1
+    return compared
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        statement_store.STORE_DIR = Path(tmp)
+        append_part("rasio", synthetic_rasio())
+
+        def full_pandas():
+            df = read_store("rasio")
+            df = df[(df["kbmi_type"] == "KBMI 4") & (df["year"] >= 2020)]
+            return df.groupby("year_quarter")["feature_042"].quantile([0.05, 0.5, 0.95])
+
+        query = dict(feature="feature_042", agg="percentiles", by="year_quarter",
+                     kbmi_type="KBMI 4", years=list(range(2020, 2025)))
+
+        print(f"full frame + pandas groupby : {timeit(full_pandas):8.1f} ms")
+        print(f"query_rasio (pandas)        : {timeit(lambda: run_query('rasio', load, backend='pandas', **query)):8.1f} ms")
+        if duckdb_available():
+            print(f"backend parity              : {check_parity()} queries identical on pandas and duckdb")
+            print(f"query_rasio (duckdb)        : {timeit(lambda: run_query('rasio', load, backend='duckdb', **query)):8.1f} ms")
+        else:
+            print("query_rasio (duckdb)        : not installed")
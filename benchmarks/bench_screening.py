@@ -0,0 +1,140 @@
+"""
+Benchmark: screening a synthetic banking universe (120 banks, 40 quarters, 300 ratios)
+against 36 threshold rules (single conditions, AND and OR combinations).
+
+Compares one pandas comparison per rule (the Rule Checker approach) with the screening
+engine on a cold cache and on a cached rule set.
+
+Run from the repository root:
+    python benchmarks/bench_screening.py
+"""
+import operator
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# add "../data" to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+
+from data_store import RasioStore
+from import_data import normalize_rasio
+from screening import screen
+
+N_BANKS = 120
+N_QUARTERS = 40
+N_FEATURES = 300
+N_RULES = 36
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_rasio() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    posisi = pd.date_range("2015-03-31", periods=N_QUARTERS, freq="Q")
+    banks = [f"Bank {i:03d}" for i in range(N_BANKS)]
+    df = pd.DataFrame({
+        "posisi": np.tile(posisi, N_BANKS),
+        "company_name": np.repeat(banks, N_QUARTERS),
+        "kbmi_type": np.repeat([f"KBMI {1 + i % 4}" for i in range(N_BANKS)], N_QUARTERS),
+    })
+    values = rng.normal(0.05, 0.02, (len(df), N_FEATURES))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    features = pd.DataFrame(values, columns=[f"feature_{i:03d}" for i in range(N_FEATURES)])
+    df = pd.concat([df, features], axis=1)
+    df["year_quarter"] = df["posisi"].dt.year.astype(str) + "_q" + df["posisi"].dt.quarter.astype(str)
+    df["company_date"] = df["company_name"] + "_" + df["year_quarter"].str.replace("_", "")
+    return normalize_rasio(df)
+
+
+def synthetic_rules() -> dict:
+    rules = {}
+    for i in range(N_RULES):
+        a, b = f"feature_{(7 * i) % N_FEATURES:03d}", f"feature_{(7 * i + 3) % N_FEATURES:03d}"
+        if i % 3 == 0:
+            rules[f"rule {i}"] = {"feature": a, "op": "lt", "value": 0.05}
+        elif i % 3 == 1:
+            rules[f"rule {i}"] = {"all": [{"feature": a, "op": "between", "low": 0.03, "high": 0.07},
+                                          {"feature": b, "op": "ge", "value": 0.04}]}
+        else:
+            rules[f"rule {i}"] = {"any": [{"feature": a, "op": "gt", "value": 0.08},
+                                          {"feature": b, "op": "le", "value": 0.02}]}
+    return rules
+
+
+def pandas_rules(df: pd.DataFrame, rules: dict) -> pd.DataFrame:
+    """
+    One pandas comparison per leaf, like the Rule Checker did for its single rule
+    """
+    ops = {"lt": operator.lt, "le": operator.le, "ge": operator.ge, "gt": operator.gt}
+
+    def evaluate(rule):
+        if "all" in rule or "any" in rule:
+            children = [evaluate(child) for child in rule.get("all", rule.get("any"))]
+            used = np.logical_and.reduce([child[1] for child in children])
+            if "all" in rule:
+                return np.logical_and.reduce([c[0] for c in children]) & used, used
+            # OR: one passing branch is enough, even if another one has no value
+            passed = np.logical_or.reduce([c[0] for c in children])
+            return passed, passed | used
+        s = pd.to_numeric(df[rule["feature"]], errors="coerce")
+        used = np.isfinite(s)
+        if rule["op"] == "between":
+            return used & (s >= rule["low"]) & (s <= rule["high"]), used
+        return used & ops[rule["op"]](s, rule["value"]), used
+
+    counts = {name: [int(passed.sum()), int(used.sum())] for name, (passed, used) in
+              ((name, evaluate(rule)) for name, rule in rules.items())}
+    return pd.DataFrame.from_dict(counts, orient="index", columns=["valid_rows", "total_rows_used"])
+
+
+if __name__ == "__main__":
+    store = RasioStore(synthetic_rasio())
+    rules = synthetic_rules()
+
+    # Same counts as the pandas loop
+    expected = pandas_rules(store.frame, rules)
+    result = screen(store, rules).counts()
+    assert (result[["valid_rows", "total_rows_used"]].to_numpy() == expected.to_numpy()).all()
+
+    # OR passes on one branch even when the other branch's feature is missing
+    frame = store.frame
+    first = (frame["feature_001"].isna() & frame["feature_000"].notna()).to_numpy().nonzero()[0][0]
+    either = {"any": [{"feature": "feature_000", "op": "gt", "value": -1.0},
+                      {"feature": "feature_001", "op": "gt", "value": -1.0}]}
+    result_or = screen(store, {"either": either})
+    assert result_or.passed[first, 0] and result_or.evaluated[first, 0]
+
+    # The cache keeps the order of the rule set: same rules, other order, other columns
+    a, b = rules["rule 0"], rules["rule 1"]
+    assert screen(store, {"B": b, "A": a}).names == ["B", "A"]
+    assert screen(store, {"A": a, "B": b}).names == ["A", "B"]
+
+    # An empty rule set gives a result without rule columns
+    empty = screen(store, {})
+    assert empty.counts().empty and empty.counts_by().shape == (len(store.companies), 0)
+
+    def cold():
+        # A fresh copy of the rule set with a new threshold misses the cache every call
+        cold.calls += 1
+        fresh = dict(rules, probe={"feature": "feature_000", "op": "lt", "value": cold.calls})
+        return screen(store, fresh).counts()
+    cold.calls = 0
+
+    print(f"{len(rules)} rules over {len(store.frame)} bank-quarters")
+    print(f"pandas, one comparison per rule : {timeit(lambda: pandas_rules(store.frame, rules)):8.2f} ms")
+    print(f"screen (cold)                   : {timeit(cold):8.2f} ms")
+    print(f"screen (cached rule set)        : {timeit(lambda: screen(store, rules).counts()):8.2f} ms")
+    print(f"bank x quarter matrix of a rule : {timeit(lambda: screen(store, rules).matrix('rule 1')):8.2f} ms")
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from import_data import import_fitur_rasio, import_rasio_columns, import_rasio_normalized, rasio_fingerprint
+from panel_cube import PanelCube
+from time_axis import DateIndex, block_offsets, date_bounds, sorted_range
+from filter_engine import FilterIndex
+from statement_store import store_generation
+
+# Process-wide registry: Streamlit re-executes the page scripts on every rerun and
+# for every session, but imported modules live once per process, so every page and
+# every user shares the same store instead of holding its own copy of the data.
+_REGISTRY = {}
+_LOCK = threading.Lock()
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mark the numpy blocks backing the frame read-only, so an accidental in-place
+    write from one page raises instead of leaking into every other session
+    """
+    for block in getattr(df._mgr, "blocks", []):
+        if isinstance(block.values, np.ndarray):
+            block.values.flags.writeable = False
+    return df
+
+
+class RasioStore:
+    """
+    One immutable, categorically-encoded Rasio frame shared by all pages.
+
+    Only the key columns are loaded up front; a feature column is read from the columnar
+    dataset the first time a page asks for it (`ensure` / `take(..., columns=...)`), so
+    memory grows with the features in use. Pages must not modify `frame`. Per-interaction
+    filtering should build a mask and either keep the row indices (`rows`) or take only
+    the selected rows (`take`).
+    """
+
+    def __init__(self, df: pd.DataFrame, load_columns=None, fingerprint: str = ""):
+        # `df` comes from import_rasio_normalized(): parsed keys, categoricals,
+        # sorted by (company_name, sort_key). `load_columns(columns)` returns those
+        # columns plus company_date for every row.
+        self.frame = _freeze(df)
+        self.key_columns = list(df.columns)
+        self._load_columns = load_columns
+        self._columns_lock = threading.Lock()
+        self.companies = list(df['company_name'].cat.categories)
+        self.kbmi_types = list(df['kbmi_type'].cat.categories)
+
+        # Hash of the keys plus the identity of the dataset, part of every cache key built
+        # on top of the store (the feature columns are not loaded yet, so they are not hashed)
+        digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        digest.update(fingerprint.encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+        # Company blocks: rows of company i are offsets[i]:offsets[i + 1]
+        self._company_pos = {company: i for i, company in enumerate(self.companies)}
+        self._company_offsets = block_offsets(df['company_name'].cat.codes.to_numpy(), len(self.companies))
+        self._periods = df['sort_key'].to_numpy()
+        self._posisi = df['posisi'].to_numpy()
+
+        # Sorted posisi index for date-range filters
+        self.dates = DateIndex(self._posisi)
+
+        # Bitmap index for the widget filters and their dependent option lists
+        self.filters = FilterIndex(df, ['kbmi_type', 'company_name', 'year', 'quarter'])
+
+    def ensure(self, columns) -> None:
+        """
+        Load the feature columns that are not in `frame` yet, aligned on company_date.
+        The frame is replaced by a new one sharing the existing blocks, so frames already
+        handed out stay valid. Columns the dataset does not have are ignored.
+        """
+        missing = [column for column in columns if column not in self.frame.columns]
+        if not missing or self._load_columns is None:
+            return
+        with self._columns_lock:
+            missing = [column for column in columns if column not in self.frame.columns]
+            if not missing:
+                return
+            loaded = self._load_columns(missing).set_index('company_date')
+            loaded = loaded[[column for column in missing if column in loaded.columns]]
+            if loaded.shape[1] == 0:
+                return
+            aligned = loaded.reindex(self.frame['company_date'].to_numpy()).reset_index(drop=True)
+            self.frame = _freeze(pd.concat([self.frame, aligned], axis=1, copy=False))
+
+    def loaded_columns(self) -> list:
+        """
+        Feature columns materialized so far
+        """
+        return [column for column in self.frame.columns if column not in self.key_columns]
+
+    def company_rows(self, company, start_period: int = None, end_period: int = None) -> slice:
+        """
+        Rows of one company, optionally limited to [start_period, end_period],
+        found with binary searches on the pre-sorted period index
+        """
+        i = self._company_pos.get(company)
+        if i is None:
+            return slice(0, 0)
+        start, stop = self._company_offsets[i], self._company_offsets[i + 1]
+        return sorted_range(self._periods, start_period, end_period, start=start, stop=stop)
+
+    def company_date_rows(self, company, start_date=None, end_date=None) -> slice:
+        """
+        Rows of one company with posisi inside [start_date, end_date]; posisi is in
+        time order inside a company block, so this is two binary searches
+        """
+        block = self.company_rows(company)
+        low, high = date_bounds(start_date, end_date)
+        return sorted_range(self._posisi, low, high, start=block.start, stop=block.stop)
+
+    def rows(self, mask) -> np.ndarray:
+        """
+        Row positions selected by a boolean mask (a scalar True selects every row)
+        """
+        if np.isscalar(mask):
+            return np.arange(len(self.frame)) if mask else np.empty(0, dtype=np.intp)
+        return np.flatnonzero(np.asarray(mask))
+
+    def take(self, mask, columns: list = None) -> pd.DataFrame:
+        """
+        Materialize only the selected rows, the shared frame itself is never copied.
+        A slice (e.g. from company_rows) or an array of row positions is taken as is.
+        With `columns`, those features are loaded if needed and only the key columns
+        plus them are copied; without, every column loaded so far is returned.
+        """
+        if columns is not None:
+            self.ensure(columns)
+        frame = self.frame
+        if isinstance(mask, slice) or (isinstance(mask, np.ndarray) and mask.dtype.kind in "iu"):
+            rows = mask
+        else:
+            rows = self.rows(mask)
+        if columns is None:
+            return frame.iloc[rows]
+        selected = self.key_columns + [column for column in columns if column not in self.key_columns]
+        return frame.iloc[rows, frame.columns.get_indexer([column for column in selected if column in frame.columns])]
+
+
+def get_rasio_store() -> RasioStore:
+    """
+    Return the process-wide RasioStore, loading it on first use and again after
+    data/ingest.py upserted new rows (the store generation is a small manifest read)
+    """
+    entry = _REGISTRY.get("rasio")
+    if entry is None or entry[0] != store_generation("rasio"):
+        with _LOCK:
+            entry = _REGISTRY.get("rasio")
+            if entry is None or entry[0] != store_generation("rasio"):
+                # The load may seed the dataset, so its generation is read afterwards
+                store = RasioStore(
+                    import_rasio_normalized(columns=[]),
+                    load_columns=import_rasio_columns,
+                    fingerprint=rasio_fingerprint(),
+                )
+                entry = (store_generation("rasio"), store)
+                _REGISTRY["rasio"] = entry
+    return entry[1]
+
+
+def get_rasio_cube(features: list = None) -> PanelCube:
+    """
+    Return the process-wide dense cube of the Rasio features (default import_fitur_rasio()),
+    built from the shared store and rebuilt when the store is reloaded
+    """
+    store = get_rasio_store()
+    features = import_fitur_rasio() if features is None else list(features)
+    key = ("rasio_cube", tuple(features))
+    entry = _REGISTRY.get(key)
+    if entry is None or entry[0] != store.version:
+        with _LOCK:
+            entry = _REGISTRY.get(key)
+            if entry is None or entry[0] != store.version:
+                store.ensure(features)
+                entry = (store.version, PanelCube(store.frame, features))
+                _REGISTRY[key] = entry
+    return entry[1]
+
+
+def reset_stores() -> None:
+    """
+    Drop the loaded stores, the next access reloads them (e.g. after new data is ingested)
+    """
+    with _LOCK:
+        _REGISTRY.clear()
@@ -0,0 +1,99 @@
+"""
+Derived metrics of every ratio, per bank: quarter-on-quarter and year-on-year changes,
+trailing 4-quarter mean and volatility.
+
+Computed for all features at once on the frame sorted by (company, period): the value
+of the same bank `lag` quarters earlier is found with one binary search over the
+(company, period) keys, so a missing quarter gives NaN instead of silently comparing
+with an older one. Materialized at ingestion as its own dataset next to the ratios
+(store/statement=rasio_derived), one column per feature x metric, e.g. npl_gross__qoq.
+"""
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from statement_store import append_part, mark_derived, seed_store, store_generation
+from time_axis import period_to_year_quarter, quarter_period
+
+# Dataset of the metrics, next to the "rasio" dataset they are computed from
+DERIVED_STATEMENT = "rasio_derived"
+
+# qoq / yoy: change vs 1 / 4 quarters earlier (same unit as the ratio, i.e. percentage points),
+# mean_4q / std_4q: mean and standard deviation (ddof=1) of the last 4 quarters, NaN unless all 4 exist
+METRICS = ("qoq", "yoy", "mean_4q", "std_4q")
+
+# Quarters a row looks back: changing a quarter changes the metrics of the next WINDOW quarters
+WINDOW = 4
+
+
+def derived_column(feature: str, metric: str) -> str:
+    return f"{feature}__{metric}"
+
+
+def derived_columns(features: list, metrics=METRICS) -> list:
+    return [derived_column(feature, metric) for feature in features for metric in metrics]
+
+
+def lag_positions(company_codes: np.ndarray, periods: np.ndarray, lag: int) -> np.ndarray:
+    """
+    Row of the same company `lag` quarters earlier, -1 where there is none.
+    Rows must be sorted by (company, period).
+    """
+    keys = company_codes.astype(np.int64) * (1 << 32) + periods
+    targets = keys - lag
+    positions = np.minimum(np.searchsorted(keys, targets), len(keys) - 1)
+    return np.where(keys[positions] == targets, positions, -1)
+
+
+def compute_derived(df: pd.DataFrame, features: list) -> pd.DataFrame:
+    """
+    Derived metrics of `df` (key columns with company_name / year_quarter plus the feature
+    columns), rows sorted by (company, period). Every other column of `df` is kept as a key column.
+    """
+    features = [feature for feature in features if feature in df.columns]
+    periods = quarter_period(df["year_quarter"])
+    codes = pd.factorize(df["company_name"], sort=True)[0]
+    order = np.lexsort((periods, codes))
+    periods, codes = periods[order], codes[order]
+
+    keys = df[[column for column in df.columns if column not in features]].iloc[order].reset_index(drop=True)
+    values = df[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)[order]
+
+    def lagged(lag):
+        positions = lag_positions(codes, periods, lag)
+        return np.where((positions >= 0)[:, None], values[positions], np.nan)
+
+    window = np.stack([values] + [lagged(lag) for lag in range(1, WINDOW)])
+    metrics = {
+        "qoq": values - window[1],
+        "yoy": values - lagged(4),
+        "mean_4q": window.mean(axis=0),
+        "std_4q": window.std(axis=0, ddof=1),
+    }
+
+    blocks = {derived_column(feature, metric): metrics[metric][:, i]
+              for i, feature in enumerate(features) for metric in METRICS}
+    return pd.concat([keys, pd.DataFrame(blocks)[derived_columns(features)]], axis=1)
+
+
+def materialize_derived(load: Callable, features: list, year_quarters: list = None) -> None:
+    """
+    (Re)compute the metrics from `load(years)` (raw ratio rows of those years, all years for None).
+    With `year_quarters`, only the rows whose window contains one of those quarters (the
+    quarter itself and the next WINDOW quarters) are recomputed and upserted.
+    """
+    base_generation = store_generation("rasio")
+    if year_quarters is None:
+        seed_store(DERIVED_STATEMENT, [], lambda: compute_derived(load(None), features))
+    else:
+        changed = np.unique(quarter_period(pd.Series(sorted(set(year_quarters)))))
+        affected = np.unique(changed[:, None] + np.arange(WINDOW + 1))
+        first_year, _ = period_to_year_quarter(changed.min() - WINDOW)
+        last_year, _ = period_to_year_quarter(affected.max())
+        df = compute_derived(load(list(range(int(first_year), int(last_year) + 1))), features)
+        df = df[np.isin(quarter_period(df["year_quarter"]), affected)]
+        if len(df):
+            append_part(DERIVED_STATEMENT, df)
+
+    mark_derived(DERIVED_STATEMENT, "rasio", features, base_generation)
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+def canonical_key(**params) -> str:
+    """
+    Stable hash of the inputs of a chart: keys are sorted and values are serialized
+    as JSON (dates, numpy scalars... through str), so equal filter states map to the same key
+    """
+    payload = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class FigureCache:
+    """
+    Process-wide LRU cache for built chart objects (figures, summary tables, ...).
+
+    The key must include everything the chart depends on, including the data version,
+    so an unchanged chart is served from the cache and only the chart whose inputs
+    changed is rebuilt. Cached objects are shared, callers must not modify them.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: str, build: Callable):
+        """
+        Return the cached value for `key`, calling `build()` on a miss
+        """
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        # Built outside the lock so a slow chart does not block the other sessions
+        value = build()
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        """
+        Counters to watch the cache: hits, misses, hit rate, evictions and size
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_FIGURE_CACHE = FigureCache()
+
+
+def get_figure_cache() -> FigureCache:
+    """
+    Return the process-wide figure cache shared by all pages and sessions
+    """
+    return _FIGURE_CACHE
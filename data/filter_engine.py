@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    Precomputed bitmap index over the categorical dimensions of a frame.
+
+    For every value of every dimension a packed bitmap (one bit per row) is built once.
+    A query ORs the bitmaps of the selected values inside a dimension and ANDs the
+    dimensions together, so it never rescans the frame. An empty (or None) selection
+    means "no constraint" on that dimension, like the page widgets.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensions: list):
+        self.n_rows = len(df)
+        self.dimensions = list(dimensions)
+        self._values = {}
+        self._positions = {}
+        self._bitmaps = {}
+
+        for dim in self.dimensions:
+            column = df[dim]
+            if hasattr(column, "cat"):
+                codes = column.cat.codes.to_numpy()
+                values = list(column.cat.categories)
+            else:
+                codes, uniques = pd.factorize(column, sort=True)
+                values = uniques.tolist()
+
+            # One-hot (values x rows) in one pass, then packed to 1 bit per row
+            one_hot = np.zeros((len(values), self.n_rows), dtype=bool)
+            valid = codes >= 0
+            one_hot[codes[valid], np.flatnonzero(valid)] = True
+
+            self._values[dim] = values
+            self._positions[dim] = {value: i for i, value in enumerate(values)}
+            self._bitmaps[dim] = np.packbits(one_hot, axis=1)
+
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def values(self, dim: str) -> list:
+        """
+        All distinct values of a dimension, sorted
+        """
+        return list(self._values[dim])
+
+    def _dimension_bitmap(self, dim: str, selected) -> np.ndarray:
+        positions = [self._positions[dim][v] for v in selected if v in self._positions[dim]]
+        if not positions:
+            return np.zeros_like(self._all)
+        return np.bitwise_or.reduce(self._bitmaps[dim][positions], axis=0)
+
+    def bitmap(self, **selections) -> np.ndarray:
+        """
+        Packed bitmap of the rows matching every non-empty selection
+        """
+        result = self._all.copy()
+        for dim, selected in selections.items():
+            if selected is None or len(selected) == 0:
+                continue
+            result &= self._dimension_bitmap(dim, selected)
+        return result
+
+    def mask(self, **selections) -> np.ndarray:
+        """
+        Boolean row mask of the rows matching every non-empty selection
+        """
+        return np.unpackbits(self.bitmap(**selections), count=self.n_rows).astype(bool)
+
+    def rows(self, **selections) -> np.ndarray:
+        """
+        Row positions matching every non-empty selection
+        """
+        return np.flatnonzero(self.mask(**selections))
+
+    def options(self, dim: str, **selections) -> list:
+        """
+        Distinct values of `dim` that still have rows under the other selections,
+        for dependent widgets (e.g. companies available for the selected KBMI)
+        """
+        selections.pop(dim, None)
+        matched = self.bitmap(**selections)
+        present = (self._bitmaps[dim] & matched).any(axis=1)
+        return [value for value, keep in zip(self._values[dim], present) if keep]
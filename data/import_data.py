@@ -1,16 +1,34 @@
+import json
 import pandas as pd
 from pathlib import Path
 
-def import_rasio() -> pd.DataFrame:
+from derived_metrics import DERIVED_STATEMENT, METRICS, compute_derived, derived_columns, materialize_derived
+from peer_ranks import PEER_STATEMENT, MEASURES, SCOPES, compute_peer_ranks, materialize_peer_ranks, peer_columns
+from query_engine import run_query
+from snapshot_cache import load_snapshot, stat_entry
+from statement_store import STORE_LOCK, derived_current, ensure_store, read_manifest, read_store
+from time_axis import quarter_period, period_to_year_quarter, sort_by_company_period
+
+# Path to this file's folder ("data")
+base_path = Path(__file__).parent
+
+# Build absolute paths to the Excel files
+RASIO_FILES = [
+    base_path / "summarized rasio - KBMI 1.xlsx",
+    base_path / "summarized rasio - KBMI 4.xlsx",
+]
+ASET_FILES = [
+    base_path / "summarized_aset.xlsx",
+]
+
+# Columns every page needs (filters, axes, keys); the feature columns are only read on request
+RASIO_KEY_COLUMNS = ["posisi", "company_name", "kbmi_type", "year", "quarter", "year_quarter", "company_date"]
+
+def read_rasio_excel() -> pd.DataFrame:
     """
-    Import all Rasio data into one dataframe
+    Parse the summarized Rasio workbooks (slow, goes through openpyxl)
     """
-    # Path to this file's folder ("data")
-    base_path = Path(__file__).parent
-
-    # Build absolute paths to the Excel files
-    file1 = base_path / "summarized rasio - KBMI 1.xlsx"
-    file4 = base_path / "summarized rasio - KBMI 4.xlsx"
+    file1, file4 = RASIO_FILES
 
     df_kbmi_1 = pd.read_excel(file1)
     df_kbmi_1 = df_kbmi_1.drop(columns=["sort_key"], errors="ignore")
@@ -20,6 +38,177 @@ def import_rasio() -> pd.DataFrame:
     df = pd.concat([df_kbmi_1, df_kbmi_4], axis=0, join="outer", ignore_index=True)
     return df
 
+def read_aset_excel() -> pd.DataFrame:
+    """
+    Parse the summarized Aset workbook (slow, goes through openpyxl)
+    """
+    return pd.read_excel(ASET_FILES[0])
+
+def _prune(df: pd.DataFrame, columns: list = None, **filters) -> pd.DataFrame:
+    """
+    Same selection as a pruned dataset read, applied to an in-memory frame
+    """
+    for column, values in filters.items():
+        if values is not None:
+            df = df[df[column].isin([values] if pd.api.types.is_scalar(values) else list(values))]
+    if columns is not None:
+        wanted = set(columns) | {"company_date"}
+        df = df[[column for column in df.columns if column in wanted]]
+    return df.reset_index(drop=True)
+
+def import_rasio(columns: list = None, kbmi_type=None, year=None) -> pd.DataFrame:
+    """
+    Import the Rasio data into one dataframe, from the partitioned Parquet dataset
+    (data/store, seeded from the summarized workbooks and extended by data/ingest.py).
+
+    `columns` (company_date is always included), `kbmi_type` and `year` prune the read:
+    only the files of the selected partitions are opened and only the requested columns
+    are decoded. When the dataset cannot be written, the workbooks are read through the snapshot cache.
+    """
+    if ensure_store("rasio", RASIO_FILES, read_rasio_excel):
+        return read_store("rasio", columns=columns, kbmi_type=kbmi_type, year=year)
+    df = load_snapshot("rasio", RASIO_FILES, read_rasio_excel)
+    return _prune(df, columns, kbmi_type=kbmi_type, year=year)
+
+def import_aset(columns: list = None, year=None) -> pd.DataFrame:
+    """
+    Import the Aset data into one dataframe, from the partitioned Parquet dataset
+    """
+    if ensure_store("aset", ASET_FILES, read_aset_excel):
+        return read_store("aset", columns=columns, year=year)
+    df = load_snapshot("aset", ASET_FILES, read_aset_excel)
+    return _prune(df, columns, year=year)
+
+def query_rasio(feature: str, agg: str = "series", **options) -> pd.DataFrame:
+    """
+    Filter + aggregate one Rasio feature and return only the small result frame
+    (see query_engine.run_query for the aggregations and filters), e.g.
+        query_rasio("npl_gross", "percentiles", by="year_quarter", kbmi_type="KBMI 4")
+    Runs on DuckDB over the Parquet dataset when available, else on pandas.
+    """
+    ensure_store("rasio", RASIO_FILES, read_rasio_excel)
+    load = lambda columns, kbmi_type, years: import_rasio(columns, kbmi_type=kbmi_type, year=years)
+    return run_query("rasio", load, feature, agg, **options)
+
+def normalize_rasio(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the key columns the pages need once, with compact dtypes:
+    posisi as datetime64, year int16, quarter int8, sort_key int32 (the period index,
+    year * 4 + quarter) and categoricals for company_name / kbmi_type.
+    Rows are sorted by (company_name, sort_key), so each company is one contiguous block.
+    """
+    df = df.copy()
+
+    if not pd.api.types.is_datetime64_any_dtype(df['posisi']):
+        df['posisi'] = pd.to_datetime(df['posisi'], errors='coerce')
+
+    # "2024_q1" -> period 8097 -> year 2024, quarter 1 (vectorized, no per-row apply)
+    period = quarter_period(df['year_quarter'])
+    year, quarter = period_to_year_quarter(period)
+    df['year'] = year.astype('int16')
+    df['quarter'] = quarter.astype('int8')
+    df['sort_key'] = period
+
+    sorted_companies = sorted(df['company_name'].dropna().unique())
+    df['company_name'] = pd.Categorical(df['company_name'], categories=sorted_companies, ordered=True)
+    df['kbmi_type'] = pd.Categorical(df['kbmi_type'], categories=sorted(df['kbmi_type'].dropna().unique()))
+
+    return sort_by_company_period(df)
+
+def import_rasio_normalized(columns: list = None, kbmi_type=None) -> pd.DataFrame:
+    """
+    Import the Rasio data with the key columns already parsed (see normalize_rasio).
+    With `columns`, only the key columns plus those feature columns are read.
+    """
+    if columns is not None:
+        columns = RASIO_KEY_COLUMNS + [column for column in columns if column not in RASIO_KEY_COLUMNS]
+    return normalize_rasio(import_rasio(columns, kbmi_type=kbmi_type))
+
+def rasio_fingerprint() -> str:
+    """
+    Identity of the data behind import_rasio: generation and seed of the dataset, or the
+    workbooks' stats when it is not available. Cheap, no data is read.
+    """
+    manifest = read_manifest("rasio")
+    if manifest.get("files"):
+        return json.dumps([manifest["generation"], manifest.get("seed")], sort_keys=True)
+    return json.dumps([stat_entry(path) for path in RASIO_FILES])
+
+def import_rasio_columns(columns: list) -> pd.DataFrame:
+    """
+    Columns for the shared store (plus company_date): ratio columns from the Rasio dataset,
+    derived metric columns (e.g. npl_gross__qoq) from import_rasio_derived
+    """
+    derived = set(derived_columns(import_fitur_rasio()))
+    df = import_rasio([column for column in columns if column not in derived])
+    wanted = [column for column in columns if column in derived]
+    if wanted:
+        df = df.merge(import_rasio_derived(columns=wanted)[["company_date"] + wanted], on="company_date", how="left")
+    return df
+
+def _rasio_source(years=None) -> pd.DataFrame:
+    return import_rasio(columns=RASIO_KEY_COLUMNS + import_fitur_rasio(), year=years)
+
+def update_peer_ranks(year_quarters: list = None) -> None:
+    """
+    Materialize the peer cube of the Rasio features (only `year_quarters` when given)
+    """
+    materialize_peer_ranks(_rasio_source, import_fitur_rasio(), year_quarters)
+
+def update_rasio_derived(year_quarters: list = None) -> None:
+    """
+    Materialize the derived metrics of the Rasio features (only around `year_quarters` when given)
+    """
+    materialize_derived(_rasio_source, import_fitur_rasio(), year_quarters)
+
+def _import_derived(statement: str, update, compute, columns: list, **filters) -> pd.DataFrame:
+    """
+    Pruned read of a dataset computed from the Rasio dataset, (re)built first when the
+    ratios changed since; computed in memory when the dataset cannot be written
+    """
+    if ensure_store("rasio", RASIO_FILES, read_rasio_excel):
+        try:
+            # One session rebuilds, the others wait and then find the dataset current
+            with STORE_LOCK:
+                if not derived_current(statement, "rasio", import_fitur_rasio()):
+                    update()
+            return read_store(statement, columns=columns, **filters)
+        except (OSError, ValueError, TypeError):
+            pass
+    df = compute(_rasio_source(), import_fitur_rasio())
+    return _prune(df, columns, **filters)
+
+def import_peer_ranks(features: list = None, measures=MEASURES, scopes=tuple(SCOPES), kbmi_type=None, year=None) -> pd.DataFrame:
+    """
+    Rank, peer count, percentile and z-score of every bank per year_quarter, within its
+    kbmi_type ("kbmi") and overall ("all"), see peer_ranks.py. A lookup in the cube
+    materialized by data/ingest.py, only the requested columns are read.
+    Columns are e.g. npl_gross__percentile_kbmi.
+    """
+    features = import_fitur_rasio() if features is None else list(features)
+    columns = RASIO_KEY_COLUMNS + peer_columns(features, measures, scopes)
+    return _import_derived(PEER_STATEMENT, update_peer_ranks, compute_peer_ranks, columns,
+                           kbmi_type=kbmi_type, year=year)
+
+def import_rasio_derived(features: list = None, metrics=METRICS, columns: list = None, kbmi_type=None, year=None) -> pd.DataFrame:
+    """
+    QoQ / YoY changes, trailing 4-quarter mean and volatility of every Rasio feature per
+    bank and year_quarter, see derived_metrics.py. Materialized by data/ingest.py next to
+    the ratios, only the requested columns are read. Columns are e.g. npl_gross__yoy;
+    `columns` selects derived columns directly.
+    """
+    if columns is None:
+        features = import_fitur_rasio() if features is None else list(features)
+        columns = derived_columns(features, metrics)
+    return _import_derived(DERIVED_STATEMENT, update_rasio_derived, compute_derived, RASIO_KEY_COLUMNS + list(columns),
+                           kbmi_type=kbmi_type, year=year)
+
+# Datasets computed from the Rasio dataset, kept up to date by data/ingest.py
+RASIO_DERIVED = {
+    PEER_STATEMENT: update_peer_ranks,
+    DERIVED_STATEMENT: update_rasio_derived,
+}
+
 def import_fitur_rasio() -> list :
     fitur_rasio = [
         'aset_produktif_bermasalah_dan_aset_non_produktif_bermasalah_terhadap_total_aset_produktif_dan_aset_non_produktif',
@@ -0,0 +1,315 @@
+"""
+Incremental ingestion of the quarterly statement workbooks into the partitioned
+Parquet dataset under data/store (see statement_store.py).
+
+    python data/ingest.py                 # rasio and aset
+    python data/ingest.py --statement rasio --dry-run
+    python data/ingest.py --export-excel exports/
+
+Rows of company_date keys that are not in the store yet, and rows whose values
+changed in the workbook (corrections), are appended; the last write of a key wins,
+so a new quarter costs one small part instead of a rebuild of the summarized
+workbooks. Workbooks whose content did not change are not even parsed. The datasets
+computed from the ratios (peer ranks, derived metrics) are updated around the
+quarters that received rows.
+"""
+import argparse
+import datetime
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent))
+
+from import_data import ASET_FILES, RASIO_DERIVED, RASIO_FILES, import_fitur_rasio, read_aset_excel, read_rasio_excel
+from snapshot_cache import file_sha256
+from statement_store import (append_part, compact_derived, compact_store, derived_current, ensure_store, export_excel,
+                             read_manifest, read_store, seed_store, store_keys, write_manifest)
+
+base_path = Path(__file__).parent
+
+# Source workbooks of every statement. A workbook either has one sheet per company
+# (company = sheet name) or one sheet with a `company_col` column per row.
+SOURCES = {
+    "rasio": [
+        {"path": base_path / "Rasio-KBMI-1.xlsx", "kbmi_type": "KBMI 1"},
+        {"path": base_path / "Rasio-KBMI-4.xlsx", "company_col": "bank_name"},
+    ],
+    "aset": [
+        {"path": base_path / "Aset.xlsx"},
+    ],
+}
+
+# Summarized workbooks the dataset of each statement is seeded from
+SEEDS = {
+    "rasio": (RASIO_FILES, read_rasio_excel),
+    "aset": (ASET_FILES, read_aset_excel),
+}
+
+# Datasets computed from each statement, with their update function (all quarters for None)
+DERIVED = {"rasio": RASIO_DERIVED}
+
+# company_date layout of each statement, as in the summarized workbooks
+# ("BCA Digital_2024q1" for rasio, "BCA Digital_2022_q4" for aset)
+KEY_SEPARATOR = {"rasio": "", "aset": "_"}
+
+# Columns of a transformed row that are not features
+ROW_KEYS = ("company_name", "kbmi_type", "posisi", "year", "quarter", "year_quarter", "company_date")
+
+# Relative difference below which a re-parsed value equals the stored one (float noise of
+# the workbooks, e.g. 0.0068000000000000005 vs 0.0068)
+VALUE_TOLERANCE = 1e-9
+
+_DATE_LABEL = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def normalize_fitur(names: pd.Series) -> pd.Series:
+    """
+    Feature labels into column names, like the EDA notebook: spaces and dashes
+    become underscores, then lowercase
+    """
+    return names.str.replace(" ", "_", regex=False).str.replace("-", "_", regex=False).str.lower()
+
+
+def date_columns(df: pd.DataFrame) -> dict:
+    """
+    Map every quarter column of a sheet (a datetime header or a "YYYY-MM-DD" label) to its Timestamp
+    """
+    result = {}
+    for column in df.columns:
+        if isinstance(column, (datetime.date, np.datetime64)):
+            result[column] = pd.Timestamp(column)
+        elif isinstance(column, str) and _DATE_LABEL.match(column):
+            result[column] = pd.Timestamp(column)
+    return result
+
+
+def company_date_keys(company, posisi: pd.Series, statement: str) -> pd.Series:
+    """
+    company_date keys for aligned company / posisi values
+    """
+    posisi = pd.DatetimeIndex(posisi)
+    period = posisi.year.astype(str) + KEY_SEPARATOR[statement] + "q" + posisi.quarter.astype(str)
+    return pd.Series(np.asarray(company, dtype=object), dtype=object) + "_" + pd.Series(period, dtype=object)
+
+
+def stack_sheets(sheets: dict, source: dict, statement: str) -> pd.DataFrame:
+    """
+    All sheets of a workbook as one frame: company_name, index, fitur and the quarter
+    columns, rows without a feature (section headers) dropped. One concat, no loop growth.
+    """
+    fitur = f"fitur_{statement}"
+    company_col = source.get("company_col")
+    frames = []
+    for sheet_name, df in sheets.items():
+        dates = date_columns(df)
+        part = df[[c for c in ("index", fitur) if c in df.columns] + list(dates)].rename(columns=dates)
+        part.insert(0, "company_name", df[company_col] if company_col else sheet_name)
+        if "kbmi_type" in df.columns:
+            part.insert(1, "kbmi_type", df["kbmi_type"])
+        elif "kbmi_type" in source:
+            part.insert(1, "kbmi_type", source["kbmi_type"])
+        frames.append(part)
+
+    stacked = pd.concat(frames, axis=0, join="outer", ignore_index=True)
+    stacked = stacked[stacked[fitur].notna()].copy()
+    stacked[fitur] = normalize_fitur(stacked[fitur].astype(str))
+    return stacked
+
+
+def new_cells(stacked: pd.DataFrame, known_keys: set, statement: str) -> pd.DataFrame:
+    """
+    (company_name, posisi, company_date) of the quarters that have at least one value
+    and are not in `known_keys`. Empty template columns do not count as new.
+    """
+    dates = [c for c in stacked.columns if isinstance(c, pd.Timestamp)]
+    filled = stacked.groupby("company_name", sort=False)[dates].count() > 0
+    cells = filled.stack()
+    cells = cells[cells].reset_index().iloc[:, :2]
+    cells.columns = ["company_name", "posisi"]
+    cells["company_date"] = company_date_keys(cells["company_name"], cells["posisi"], statement).to_numpy()
+    return cells[~cells["company_date"].isin(known_keys)].reset_index(drop=True)
+
+
+def transform_cells(stacked: pd.DataFrame, cells: pd.DataFrame, statement: str) -> pd.DataFrame:
+    """
+    Summarized rows (one per company_date, one column per feature) for the given cells only:
+    the companies and quarter columns outside `cells` are never melted or pivoted
+    """
+    fitur = f"fitur_{statement}"
+    dates = sorted(set(cells["posisi"]))
+    rows = stacked[stacked["company_name"].isin(set(cells["company_name"]))]
+
+    id_vars = ["company_name", "index", fitur] + (["kbmi_type"] if "kbmi_type" in rows.columns else [])
+    long = rows[id_vars + dates].melt(id_vars=id_vars, var_name="posisi", value_name="value")
+    long["value"] = pd.to_numeric(long["value"], errors="coerce")
+
+    group_keys = ["posisi", "company_name"] + (["kbmi_type"] if "kbmi_type" in long.columns else [])
+    table = long.pivot_table(index=group_keys, columns=fitur, values="value")
+
+    # Feature columns in the order of the workbook's index column
+    order = rows.groupby(fitur)["index"].min().sort_values().index
+    table = table[[c for c in order if c in table.columns]].reset_index()
+    table.columns.name = None
+
+    posisi = pd.to_datetime(table["posisi"])
+    table["posisi"] = posisi
+    table["year"] = posisi.dt.year
+    table["quarter"] = "q" + posisi.dt.quarter.astype(str)
+    table["year_quarter"] = posisi.dt.year.astype(str) + "_" + table["quarter"]
+    table["company_date"] = company_date_keys(table["company_name"], posisi, statement).to_numpy()
+
+    return table[table["company_date"].isin(set(cells["company_date"]))].reset_index(drop=True)
+
+
+def changed_rows(rows: pd.DataFrame, statement: str) -> pd.DataFrame:
+    """
+    Transformed rows of keys already in the dataset whose feature values differ from the
+    stored ones (a missing value on one side only counts as a difference). Returned as
+    full rows: the stored row with the workbook's features replaced, so the appended row
+    does not blank the features the workbook does not have.
+    """
+    if rows.empty:
+        return rows
+    filters = {"year": sorted(rows["year"].unique())}
+    if "kbmi_type" in rows.columns:
+        filters["kbmi_type"] = sorted(rows["kbmi_type"].dropna().unique())
+    stored = read_store(statement, **filters)
+    stored = stored[stored["company_date"].isin(set(rows["company_date"]))].set_index("company_date")
+    rows = rows[rows["company_date"].isin(stored.index)].set_index("company_date")
+
+    features = [column for column in rows.columns if column not in ROW_KEYS and column in stored.columns]
+    new = rows[features].to_numpy(dtype=float)
+    old = stored.loc[rows.index, features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    same = np.isclose(new, old, rtol=VALUE_TOLERANCE, atol=0, equal_nan=True)
+    changed = rows.index[~same.all(axis=1)]
+
+    merged = stored.loc[changed].copy()
+    merged[features] = rows.loc[changed, features]
+    return merged.reset_index()[list(stored.reset_index().columns)]
+
+
+def ingest(statement: str, dry_run: bool = False, force: bool = False, reseed: bool = False) -> dict:
+    """
+    Upsert the rows of a statement's workbooks into its dataset: new company_date keys
+    and keys whose values changed are appended, unchanged rows are left alone.
+    The dataset is seeded from the summarized workbooks first if needed (or always with `reseed`).
+    Returns a report with the keys added and updated per workbook.
+    """
+    report = {"statement": statement, "seeded": False, "added": {}, "updated": {}, "skipped": [], "derived": {}}
+
+    seed_sources, seed_loader = SEEDS[statement]
+    generation = read_manifest(statement).get("generation", 0)
+    # A derived dataset can be extended quarter by quarter only if it matches the dataset before the append
+    derived_were_current = {name: derived_current(name, statement, import_fitur_rasio())
+                            for name in DERIVED.get(statement, {})}
+    if reseed:
+        seed_store(statement, seed_sources, seed_loader)
+    elif not ensure_store(statement, seed_sources, seed_loader):
+        raise OSError(f"Cannot write the '{statement}' dataset")
+    manifest = read_manifest(statement)
+    report["seeded"] = manifest["generation"] != generation
+
+    known = store_keys(statement)
+    # Keys written by an earlier workbook of this run, the first workbook wins as before
+    taken = set()
+    ingested = manifest.get("sources", {})
+    sources = {}
+    frames = []
+
+    for source in SOURCES[statement]:
+        path = Path(source["path"])
+        digest = file_sha256(path)
+        if not force and ingested.get(path.name) == digest:
+            report["skipped"].append(path.name)
+            continue
+
+        stacked = stack_sheets(pd.read_excel(path, sheet_name=None), source, statement)
+        cells = new_cells(stacked, taken, statement)
+        rows = transform_cells(stacked, cells, statement) if len(cells) else None
+        added, updated = [], []
+        if rows is not None:
+            existing = rows["company_date"].isin(known)
+            changed = changed_rows(rows[existing], statement)
+            frames += [rows[~existing], changed]
+            added = rows.loc[~existing, "company_date"].tolist()
+            updated = changed["company_date"].tolist()
+            taken.update(cells["company_date"])
+        report["added"][path.name] = added
+        report["updated"][path.name] = updated
+        sources[path.name] = digest
+
+    if dry_run:
+        return report
+
+    frames = [frame for frame in frames if len(frame)]
+    new_rows = pd.concat(frames, axis=0, join="outer", ignore_index=True) if frames else None
+    if new_rows is not None:
+        append_part(statement, new_rows, sources=sources)
+    elif sources:
+        manifest = read_manifest(statement)
+        manifest["sources"] = dict(manifest.get("sources", {}), **sources)
+        write_manifest(statement, manifest)
+
+    # Datasets computed from the ratios: recompute around the quarters that received rows (new or changed),
+    # or everything when the dataset was (re)seeded or they are out of date
+    for name, update in DERIVED.get(statement, {}).items():
+        if derived_were_current[name] and not report["seeded"]:
+            if new_rows is not None:
+                report["derived"][name] = sorted(new_rows["year_quarter"].unique())
+                update(report["derived"][name])
+        elif not derived_current(name, statement, import_fitur_rasio()):
+            report["derived"][name] = "all"
+            update()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Append new and changed company-quarters to the statement dataset")
+    parser.add_argument("--statement", choices=sorted(SOURCES), action="append",
+                        help="statement to ingest (repeatable, default: all)")
+    parser.add_argument("--dry-run", action="store_true", help="only list the new and changed company_date keys (a missing dataset is still seeded)")
+    parser.add_argument("--force", action="store_true", help="re-scan workbooks even if their content is unchanged")
+    parser.add_argument("--reseed", action="store_true",
+                        help="rebuild the dataset from the summarized workbooks before ingesting")
+    parser.add_argument("--compact", action="store_true", help="rewrite the dataset as one file per partition")
+    parser.add_argument("--export-excel", metavar="DIR",
+                        help="also write every statement as an Excel workbook into DIR")
+    args = parser.parse_args(argv)
+
+    for statement in args.statement or sorted(SOURCES):
+        report = ingest(statement, dry_run=args.dry_run, force=args.force, reseed=args.reseed)
+        if report["seeded"]:
+            print(f"{statement}: dataset seeded from the summarized workbooks")
+        for name in report["skipped"]:
+            print(f"{statement}: {name} unchanged, skipped")
+        for name, keys in report["added"].items():
+            print(f"{statement}: {name} -> {len(keys)} new company_date keys")
+            for key in keys:
+                print(f"    {key}")
+        for name, keys in report["updated"].items():
+            if keys:
+                print(f"{statement}: {name} -> {len(keys)} changed company_date keys")
+                for key in keys:
+                    print(f"    {key}")
+        for name, quarters in report["derived"].items():
+            print(f"{name}: " + ("rebuilt" if quarters == "all" else f"updated for {', '.join(quarters)}"))
+        if args.dry_run:
+            continue
+        if args.compact:
+            derived = [name for name in DERIVED.get(statement, {})
+                       if derived_current(name, statement, import_fitur_rasio())]
+            compact_store(statement)
+            for name in derived:
+                compact_derived(name, statement)
+        if args.export_excel:
+            Path(args.export_excel).mkdir(parents=True, exist_ok=True)
+            print(f"{statement}: exported to {export_excel(statement, Path(args.export_excel) / f'summarized_{statement}.xlsx')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from time_axis import period_labels, quarter_period
+
+
+class PanelCube:
+    """
+    Dense (company x period x feature) float32 array of the Rasio panel.
+
+    Companies, periods (every quarter between the first and the last one, gaps included)
+    and features are integer positions found through dictionaries, so a lookup is O(1)
+    and one bank over time, one feature across banks or one quarter cross-section is a
+    plain slice of `values` (a view, nothing is copied). `observed` is the NaN mask
+    (True where a value exists) and `present` marks the (company, period) cells that
+    have a row at all. The arrays are read-only, like the shared store frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, features: list):
+        # `df` is a store frame: categorical company_name / kbmi_type, sort_key period
+        # index, one row per (company, period) and the feature columns already loaded
+        self.companies = list(df["company_name"].cat.categories)
+        self._company_names = np.asarray(self.companies, dtype=object)
+        self.features = [feature for feature in features if feature in df.columns]
+        self.kbmi_types = list(df["kbmi_type"].cat.categories)
+
+        periods = df["sort_key"].to_numpy()
+        self.first_period = int(periods.min()) if len(periods) else 0
+        n_periods = int(periods.max()) - self.first_period + 1 if len(periods) else 0
+        self.periods = np.arange(self.first_period, self.first_period + n_periods, dtype=np.int32)
+        self.labels = np.asarray(period_labels(self.periods), dtype=object)
+
+        self.company_index = {company: i for i, company in enumerate(self.companies)}
+        self.period_index = {label: i for i, label in enumerate(self.labels)}
+        self.feature_index = {feature: i for i, feature in enumerate(self.features)}
+
+        company = df["company_name"].cat.codes.to_numpy()
+        period = periods - self.first_period
+
+        self.values = np.full((len(self.companies), n_periods, len(self.features)), np.nan, dtype=np.float32)
+        self.values[company, period] = df[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+        self.observed = ~np.isnan(self.values)
+
+        self.present = np.zeros((len(self.companies), n_periods), dtype=bool)
+        self.present[company, period] = True
+
+        # kbmi_type code of every (company, period), -1 where there is no row
+        self.kbmi = np.full((len(self.companies), n_periods), -1, dtype=np.int8)
+        self.kbmi[company, period] = df["kbmi_type"].cat.codes.to_numpy()
+
+        for array in (self.values, self.observed, self.present, self.kbmi):
+            array.flags.writeable = False
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.observed.nbytes + self.present.nbytes + self.kbmi.nbytes
+
+    def period_range(self, start=None, end=None) -> slice:
+        """
+        Positions of the periods from `start` to `end` ("YYYY_qN" labels, inclusive, None is open)
+        """
+        low = 0 if start is None else int(quarter_period(pd.Series([start]))[0]) - self.first_period
+        high = len(self.periods) if end is None else int(quarter_period(pd.Series([end]))[0]) - self.first_period + 1
+        return slice(max(low, 0), max(min(high, len(self.periods)), 0))
+
+    # --- Slices (views) ---
+
+    def value(self, company, year_quarter, feature) -> float:
+        return float(self.values[self.company_index[company], self.period_index[year_quarter], self.feature_index[feature]])
+
+    def series(self, company, feature, start=None, end=None) -> np.ndarray:
+        """
+        One bank over time, one feature: (periods,) view
+        """
+        return self.values[self.company_index[company], self.period_range(start, end), self.feature_index[feature]]
+
+    def bank(self, company, start=None, end=None) -> np.ndarray:
+        """
+        One bank over time, every feature: (periods x features) view
+        """
+        return self.values[self.company_index[company], self.period_range(start, end)]
+
+    def feature(self, feature, start=None, end=None) -> np.ndarray:
+        """
+        Every bank over time, one feature: (companies x periods) view
+        """
+        return self.values[:, self.period_range(start, end), self.feature_index[feature]]
+
+    def quarter(self, year_quarter) -> np.ndarray:
+        """
+        Cross-section of one quarter: (companies x features) view
+        """
+        return self.values[:, self.period_index[year_quarter]]
+
+    # --- Conversion to pandas / Plotly inputs ---
+
+    def series_frame(self, company, features: list, start=None, end=None) -> pd.DataFrame:
+        """
+        Rows of one bank (year_quarter + feature columns), the input of px.line / go.Scatter.
+        Quarters without a row are left out, like store.take on the company block.
+        """
+        i, periods = self.company_index[company], self.period_range(start, end)
+        keep = self.present[i, periods]
+        df = pd.DataFrame(self.values[i, periods][:, [self.feature_index[f] for f in features]][keep], columns=list(features))
+        df.insert(0, "year_quarter", self.labels[periods][keep])
+        df.insert(0, "company_name", company)
+        return df
+
+    def feature_frame(self, feature, companies: list = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Long (company_name, year_quarter, feature) rows of several banks, the input of
+        px.line(..., color="company_name"); quarters without a row are left out
+        """
+        positions = np.arange(len(self.companies)) if companies is None else np.array([self.company_index[c] for c in companies], dtype=np.intp)
+        periods = self.period_range(start, end)
+        keep = self.present[positions, periods]
+        company, period = np.nonzero(keep)
+        return pd.DataFrame({
+            "company_name": self._company_names[positions[company]],
+            "year_quarter": self.labels[periods][period],
+            feature: self.values[positions[company], periods.start + period, self.feature_index[feature]],
+        })
+
+    def quarter_frame(self, year_quarter, features: list = None) -> pd.DataFrame:
+        """
+        Cross-section of one quarter: one row per bank with a row in that quarter
+        """
+        features = self.features if features is None else list(features)
+        p = self.period_index[year_quarter]
+        keep = self.present[:, p]
+        df = pd.DataFrame(self.values[keep, p][:, [self.feature_index[f] for f in features]], columns=features,
+                          index=pd.Index(self._company_names[keep], name="company_name"))
+        df.insert(0, "kbmi_type", np.asarray(self.kbmi_types, dtype=object)[self.kbmi[keep, p]])
+        return df
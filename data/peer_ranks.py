@@ -0,0 +1,84 @@
+"""
+Peer position of every bank, per feature and year_quarter: rank, peer count, percentile
+and z-score within its kbmi_type and across all banks.
+
+The cube is materialized at ingestion as its own dataset next to the ratios
+(store/statement=rasio_peers, same keys and partitions), one column per
+feature x measure x scope, e.g. npl_gross__percentile_kbmi. Pages look the position
+up instead of recomputing distributions over the filtered subset.
+"""
+from typing import Callable
+
+import pandas as pd
+
+from statement_store import append_part, mark_derived, seed_store, store_generation
+
+# Dataset of the cube, next to the "rasio" dataset it is computed from
+PEER_STATEMENT = "rasio_peers"
+
+# Peer groups: every quarter within the bank's kbmi_type, and every quarter overall
+SCOPES = {
+    "kbmi": ["year_quarter", "kbmi_type"],
+    "all": ["year_quarter"],
+}
+
+# rank: 1 = lowest value (ties share the lowest rank), count: peers with a value,
+# percentile: share of peers with a value lower or equal (0-1], zscore: (x - mean) / std (ddof=1)
+MEASURES = ("rank", "count", "percentile", "zscore")
+
+
+def peer_column(feature: str, measure: str, scope: str) -> str:
+    return f"{feature}__{measure}_{scope}"
+
+
+def peer_columns(features: list, measures=MEASURES, scopes=tuple(SCOPES)) -> list:
+    return [peer_column(feature, measure, scope) for feature in features for scope in scopes for measure in measures]
+
+
+def compute_peer_ranks(df: pd.DataFrame, features: list) -> pd.DataFrame:
+    """
+    Peer cube of `df` (key columns plus the feature columns): one grouped pass per scope
+    and measure over all features at once. Every other column of `df` is kept as a key column.
+    """
+    features = [feature for feature in features if feature in df.columns]
+    keys = df[[column for column in df.columns if column not in features]].reset_index(drop=True)
+    values = df[features].apply(pd.to_numeric, errors="coerce").reset_index(drop=True)
+
+    blocks = {}
+    for scope, group_keys in SCOPES.items():
+        groups = values.groupby([keys[column] for column in group_keys], sort=False, dropna=False)
+        mean = groups.transform("mean")
+        std = groups.transform("std")
+        measures = {
+            "rank": groups.rank(method="min"),
+            "count": groups.transform("count").where(values.notna()),
+            "percentile": groups.rank(method="max", pct=True),
+            "zscore": ((values - mean) / std.where(std > 0)).where(values.notna()),
+        }
+        for measure, frame in measures.items():
+            for feature in features:
+                blocks[peer_column(feature, measure, scope)] = frame[feature].to_numpy(dtype=float)
+
+    cube = pd.DataFrame(blocks)[peer_columns(features)]
+    return pd.concat([keys, cube], axis=1)
+
+
+def materialize_peer_ranks(load: Callable, features: list, year_quarters: list = None) -> None:
+    """
+    (Re)compute the cube from `load(years)` (raw ratio rows of those years, all years for None).
+    With `year_quarters`, only those quarters are recomputed and upserted: a bank's position
+    only depends on the other banks of the same quarter, so appending a quarter does not
+    touch the rest of the cube.
+    """
+    base_generation = store_generation("rasio")
+    if year_quarters is None:
+        seed_store(PEER_STATEMENT, [], lambda: compute_peer_ranks(load(None), features))
+    else:
+        year_quarters = sorted(set(year_quarters))
+        df = load(sorted({int(str(quarter)[:4]) for quarter in year_quarters}))
+        df = df[df["year_quarter"].isin(year_quarters)]
+        if len(df):
+            append_part(PEER_STATEMENT, compute_peer_ranks(df, features))
+
+    mark_derived(PEER_STATEMENT, "rasio", features, base_generation)
+
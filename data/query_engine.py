@@ -0,0 +1,301 @@
+"""
+Filter + aggregate queries over a statement dataset that return only the small result frame.
+
+Two backends answer the same queries:
+- "duckdb": a lazy scan of the Parquet files of the selected partitions, filters and the
+  aggregation run inside DuckDB, only the result is converted to pandas (optional, needs
+  `pip install duckdb`)
+- "pandas": a pruned read (one feature, selected partitions) and the grouped numpy
+  statistics of stats.py, always available
+
+The backend defaults to the QUERY_BACKEND environment variable, else DuckDB when it is
+installed and the dataset exists, else pandas.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from stats import DEFAULT_PERCENTILES, grouped_box_stats, grouped_histogram, grouped_summary_stats
+from statement_store import read_manifest, select_files, statement_dir
+from time_axis import date_bounds
+
+AGGREGATIONS = ("series", "percentiles", "box", "histogram")
+BACKENDS = ("duckdb", "pandas")
+
+
+def duckdb_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def choose_backend(statement: str, backend: str = None) -> str:
+    backend = backend or os.environ.get("QUERY_BACKEND")
+    if backend is None:
+        backend = "duckdb" if duckdb_available() and read_manifest(statement).get("files") else "pandas"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown query backend '{backend}', expected one of {BACKENDS}")
+    return backend
+
+
+def auto_bin_edges(n: int, low: float, high: float, q1: float, q3: float, bins="auto") -> np.ndarray:
+    """
+    np.histogram_bin_edges(values, bins) from summary numbers only (count, min, max, quartiles),
+    so the edges can be derived without pulling the values: bins is an int or "auto"
+    (the larger bin count of the Sturges and Freedman-Diaconis rules, like numpy)
+    """
+    if n == 0:
+        return np.array([0.0, 1.0])
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+        return np.linspace(low, high, (1 if bins == "auto" else int(bins)) + 1)
+    if bins != "auto":
+        return np.linspace(low, high, int(bins) + 1)
+
+    span = high - low
+    sturges = span / (np.log2(n) + 1.0)
+    fd = 2.0 * (q3 - q1) * n ** (-1.0 / 3.0)
+    width = min(fd, sturges) if fd else sturges
+    n_bins = int(np.ceil(span / width)) if width else 1
+    return np.linspace(low, high, n_bins + 1)
+
+
+def _as_list(values):
+    if values is None:
+        return None
+    return [values] if pd.api.types.is_scalar(values) else list(values)
+
+
+# ---------------------------------------------------------------- pandas backend
+
+def _pandas_rows(load, feature: str, companies, kbmi_type, start_date, end_date, years, quarters) -> pd.DataFrame:
+    df = load(["posisi", "company_name", "year_quarter", feature], kbmi_type, years)
+    keep = df[feature].notna().to_numpy()
+    if companies is not None:
+        keep &= df["company_name"].isin(companies).to_numpy()
+    posisi = pd.to_datetime(df["posisi"])
+    if start_date is not None or end_date is not None:
+        low, high = date_bounds(start_date, end_date)
+        values = posisi.to_numpy()
+        if low is not None:
+            keep &= values >= low
+        if high is not None:
+            keep &= values <= high
+    if quarters is not None:
+        keep &= posisi.dt.quarter.isin(quarters).to_numpy()
+
+    rows = df.loc[keep, ["company_name", "posisi", "year_quarter", feature]].rename(columns={feature: "value"})
+    rows["posisi"] = pd.to_datetime(rows["posisi"])
+    return rows.sort_values(["company_name", "posisi"], kind="stable").reset_index(drop=True)
+
+
+def _pandas_aggregate(rows: pd.DataFrame, agg: str, by, percentiles, bins, whisker) -> pd.DataFrame:
+    if agg == "series":
+        return rows
+
+    groups = rows[by].to_numpy() if by else np.zeros(len(rows), dtype=np.int64)
+    codes, labels = pd.factorize(groups, sort=True)
+    labels = list(labels) if by else ["all"]
+    values = rows["value"].to_numpy(dtype=float)
+
+    if agg == "percentiles":
+        result = grouped_summary_stats(values, codes, percentiles)
+        result.index = pd.Index([labels[code] for code in result.index], name=by or "group")
+        return result
+
+    if agg == "box":
+        box, outlier_codes, _ = grouped_box_stats(values, codes, len(labels), whisker=whisker)
+        box["outliers"] = np.bincount(outlier_codes, minlength=len(labels))[box.index.to_numpy()]
+        box.index = pd.Index([labels[code] for code in box.index], name=by or "group")
+        return box
+
+    edges, counts = grouped_histogram(values, codes, len(labels), bins=bins)
+    return _histogram_frame(edges, counts, labels, by)
+
+
+def _histogram_frame(edges: np.ndarray, counts: np.ndarray, labels: list, by) -> pd.DataFrame:
+    n_groups, n_bins = counts.shape
+    return pd.DataFrame({
+        by or "group": np.repeat(labels, n_bins),
+        "bin_left": np.tile(edges[:-1], n_groups),
+        "bin_right": np.tile(edges[1:], n_groups),
+        "count": counts.ravel(),
+    })
+
+
+# ---------------------------------------------------------------- duckdb backend
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _duckdb_base(statement: str, feature: str, companies, kbmi_type, start_date, end_date, years, quarters):
+    """
+    SQL of the filtered rows (company_name, posisi, year_quarter, value) and its parameters.
+    Only the files of the selected partitions are scanned; when several generations hold
+    the same company_date, the latest one wins like in read_store.
+    """
+    manifest = read_manifest(statement)
+    if feature not in manifest.get("columns", []):
+        raise KeyError(f"'{feature}' is not a column of the '{statement}' dataset")
+    files = [str(statement_dir(statement) / entry["path"])
+             for entry in select_files(manifest, kbmi_type=kbmi_type, year=years)]
+
+    where = ["value IS NOT NULL", "NOT isnan(value)"]
+    params = [files]
+    if companies is not None:
+        where.append("list_contains(?, company_name)")
+        params.append(list(companies))
+    low, high = date_bounds(start_date, end_date)
+    if low is not None:
+        where.append("posisi >= ?")
+        params.append(pd.Timestamp(low).to_pydatetime())
+    if high is not None:
+        # Exclusive next-day bound, DuckDB timestamps are microseconds
+        where.append("posisi < ?")
+        params.append(pd.Timestamp(high + np.timedelta64(1, "ns")).to_pydatetime())
+    if quarters is not None:
+        where.append("list_contains(?, quarter(posisi))")
+        params.append([int(q) for q in quarters])
+
+    # Latest generation of every key first, then the filters (a newer empty value must win)
+    sql = f"""
+        SELECT company_name, posisi, year_quarter, value FROM (
+            SELECT company_name, posisi, year_quarter, CAST({_quote(feature)} AS DOUBLE) AS value
+            FROM read_parquet(?, hive_partitioning = true, union_by_name = true, filename = true)
+            QUALIFY row_number() OVER (
+                PARTITION BY company_date
+                ORDER BY CAST(regexp_extract(filename, 'part-(\\d+)', 1) AS INTEGER) DESC
+            ) = 1
+        )
+        WHERE {" AND ".join(where)}
+    """
+    return sql, params, bool(files)
+
+
+def _duckdb_query(statement: str, feature: str, agg: str, by, filters: dict, percentiles, bins, whisker) -> pd.DataFrame:
+    import duckdb
+
+    base, params, has_files = _duckdb_base(statement, feature, **filters)
+    if not has_files:
+        # Nothing to scan, the pandas aggregation of an empty frame has the right shape
+        empty = pd.DataFrame({"company_name": pd.Series(dtype=object), "posisi": pd.Series(dtype="datetime64[ns]"),
+                              "year_quarter": pd.Series(dtype=object), "value": pd.Series(dtype=float)})
+        return _pandas_aggregate(empty, agg, by, percentiles, bins, whisker)
+
+    group = _quote(by) if by else "'all'"
+    name = by or "group"
+    con = duckdb.connect()
+    try:
+        if agg == "series":
+            return con.execute(f"SELECT * FROM ({base}) ORDER BY company_name, posisi", params).df()
+
+        if agg == "percentiles":
+            fractions = [p / 100 for p in percentiles]
+            df = con.execute(f"""
+                SELECT {group} AS "{name}", count(value) AS count, min(value) AS min, max(value) AS max,
+                       avg(value) AS mean, stddev_samp(value) AS std,
+                       quantile_cont(value, {fractions}) AS q
+                FROM ({base}) GROUP BY 1 ORDER BY 1
+            """, params).df()
+            quantiles = np.array(df.pop("q").tolist(), dtype=float).reshape(len(df), len(percentiles))
+            for i, p in enumerate(percentiles):
+                df[p] = quantiles[:, i]
+            return df.set_index(name)
+
+        if agg == "box":
+            return con.execute(f"""
+                WITH base AS ({base}),
+                quartiles AS (
+                    SELECT {group} AS g, count(*) AS count, avg(value) AS mean,
+                           quantile_cont(value, [0.25, 0.5, 0.75]) AS q
+                    FROM base GROUP BY 1
+                ),
+                fences AS (
+                    SELECT g, count, mean, q[1] AS q1, q[2] AS median, q[3] AS q3,
+                           q[1] - {float(whisker)} * (q[3] - q[1]) AS low, q[3] + {float(whisker)} * (q[3] - q[1]) AS high
+                    FROM quartiles
+                )
+                SELECT g AS "{name}", fences.count, mean, q1, median, q3,
+                       min(value) FILTER (WHERE value >= low AND value <= high) AS lowerfence,
+                       max(value) FILTER (WHERE value >= low AND value <= high) AS upperfence,
+                       count(*) FILTER (WHERE value < low OR value > high) AS outliers
+                FROM base JOIN fences ON {group} = g
+                GROUP BY ALL ORDER BY 1
+            """, params).df().set_index(name)
+
+        # histogram: the edges come from four summary numbers, then one grouped count
+        n, low, high, q1, q3 = con.execute(f"""
+            SELECT count(value), min(value), max(value), quantile_cont(value, 0.25), quantile_cont(value, 0.75)
+            FROM ({base})
+        """, params).fetchone()
+        edges = auto_bin_edges(n, low, high, q1, q3, bins)
+        n_bins = len(edges) - 1
+        # Arithmetic bin index, then nudged by one where rounding put a value on the wrong
+        # side of an edge, exactly like stats.grouped_histogram / np.histogram. The edges are
+        # bound as a DOUBLE[] parameter (decimal literals could be off by one ulp); DuckDB
+        # lists are 1-based: e[b + 1] is the left edge of bin b
+        scale = f"{n_bins} / (e[{n_bins + 1}] - e[1])" if edges[-1] > edges[0] else "0.0"
+        counts = con.execute(f"""
+            WITH binned AS (
+                SELECT {group} AS g, value, e,
+                       least(greatest(CAST(floor((value - e[1]) * ({scale})) AS BIGINT), 0), {n_bins - 1}) AS b
+                FROM ({base}), (SELECT ?::DOUBLE[] AS e)
+            )
+            SELECT g,
+                   CASE WHEN value < e[b + 1] THEN b - 1
+                        WHEN value >= e[b + 2] AND b < {n_bins - 1} THEN b + 1
+                        ELSE b END AS b,
+                   count(*) AS c
+            FROM binned GROUP BY 1, 2
+        """, params + [[float(edge) for edge in edges]]).df()
+    finally:
+        con.close()
+
+    labels = sorted(counts["g"].unique()) if by else ["all"]
+    matrix = np.zeros((len(labels), n_bins), dtype=np.int64)
+    if len(counts):
+        positions = {label: i for i, label in enumerate(labels)}
+        matrix[counts["g"].map(positions).to_numpy(), counts["b"].to_numpy()] = counts["c"].to_numpy()
+    return _histogram_frame(edges, matrix, labels, by)
+
+
+# ---------------------------------------------------------------- entry point
+
+def run_query(statement: str, load, feature: str, agg: str = "series", by: str = None,
+              companies=None, kbmi_type=None, start_date=None, end_date=None, years=None, quarters=None,
+              percentiles=DEFAULT_PERCENTILES, bins="auto", whisker: float = 1.5, backend: str = None) -> pd.DataFrame:
+    """
+    Filter one feature of a statement and aggregate it:
+    - "series": the filtered rows (company_name, posisi, year_quarter, value)
+    - "percentiles": count/min/max/mean/std and the percentiles, per `by` group (or overall)
+    - "box": count/mean/q1/median/q3/whiskers and the outlier count per group
+    - "histogram": shared bins, one row per (group, bin) with its count
+
+    `load(columns, kbmi_type, years)` is the pandas read (import_rasio) used by the pandas backend.
+    The backend that answered is in `result.attrs["backend"]`.
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{agg}', expected one of {AGGREGATIONS}")
+    filters = {
+        "companies": _as_list(companies),
+        "kbmi_type": _as_list(kbmi_type),
+        "start_date": start_date,
+        "end_date": end_date,
+        "years": _as_list(years),
+        "quarters": _as_list(quarters),
+    }
+    if agg == "box" and by is None:
+        by = "company_name"
+
+    backend = choose_backend(statement, backend)
+    if backend == "duckdb":
+        result = _duckdb_query(statement, feature, agg, by, filters, percentiles, bins, whisker)
+    else:
+        rows = _pandas_rows(load, feature, **filters)
+        result = _pandas_aggregate(rows, agg, by, percentiles, bins, whisker)
+    result.attrs["backend"] = backend
+    return result
@@ -0,0 +1,232 @@
+"""
+Batch screening of banks against threshold rules.
+
+A rule is a condition on one feature or an AND / OR of rules:
+    {"feature": "npl_gross", "op": "lt", "value": 0.05}
+    {"feature": "loan_to_deposit_ratio", "op": "between", "low": 0.78, "high": 0.92}
+    {"all": [rule, ...]}     # AND
+    {"any": [rule, ...]}     # OR
+Ops are lt / le / eq / ge / gt / between (inclusive), like the Rule Checker. A rule set is
+a dict {name: rule}. Every leaf condition of the whole rule set is evaluated in one
+broadcast comparison over a numeric feature matrix, then the AND / OR nodes combine the
+leaf columns. Results are cached by the hash of the rule set and the data version.
+"""
+import numpy as np
+import pandas as pd
+
+from figure_cache import FigureCache, canonical_key
+
+OPS = ("lt", "le", "eq", "ge", "gt", "between")
+
+# Tolerance of "eq", same as the Rule Checker
+EQ_TOLERANCE = 1e-9
+
+# Example rule set with common regulatory thresholds
+REGULATORY_RULES = {
+    "NPL gross < 5%": {"feature": "npl_gross", "op": "lt", "value": 0.05},
+    "LDR 78%-92%": {"feature": "loan_to_deposit_ratio", "op": "between", "low": 0.78, "high": 0.92},
+    "BOPO < 85%": {"feature": "biaya_operasional_terhadap_pendapatan_operasional", "op": "lt", "value": 0.85},
+}
+
+# Feature matrices and screening results, shared by every session of the process
+_CACHE = FigureCache(maxsize=64)
+
+
+def _interval(leaf: dict) -> tuple:
+    """
+    A leaf condition as an interval (low, high, low inclusive, high inclusive)
+    """
+    op = leaf.get("op")
+    if op not in OPS:
+        raise ValueError(f"Unknown op {op!r} in rule {leaf}, expected one of {OPS}")
+    if op == "between":
+        low, high = sorted((float(leaf["low"]), float(leaf["high"])))
+        return low, high, True, True
+    value = float(leaf["value"])
+    return {
+        "lt": (-np.inf, value, False, False),
+        "le": (-np.inf, value, False, True),
+        "eq": (value - EQ_TOLERANCE, value + EQ_TOLERANCE, True, True),
+        "ge": (value, np.inf, True, False),
+        "gt": (value, np.inf, False, False),
+    }[op]
+
+
+def _collect_leaves(rule: dict, leaves: list) -> None:
+    if "all" in rule or "any" in rule:
+        children = rule.get("all", rule.get("any"))
+        if not children:
+            raise ValueError(f"Empty compound rule {rule}")
+        for child in children:
+            _collect_leaves(child, leaves)
+    elif "feature" in rule:
+        leaves.append(rule)
+    else:
+        raise ValueError(f"A rule needs 'feature', 'all' or 'any', got {rule}")
+
+
+def rule_features(rules: dict) -> list:
+    """
+    Features referenced by a rule set, in first-use order
+    """
+    leaves = []
+    for rule in rules.values():
+        _collect_leaves(rule, leaves)
+    return list(dict.fromkeys(leaf["feature"] for leaf in leaves))
+
+
+class FeatureMatrix:
+    """
+    Numeric (rows x features) float64 matrix of a store, built once per data version:
+    non-numeric values become NaN, like pd.to_numeric(errors="coerce") in the Rule Checker
+    """
+
+    def __init__(self, store, features: list):
+        store.ensure(features)
+        frame = store.frame
+        missing = [feature for feature in features if feature not in frame.columns]
+        if missing:
+            raise KeyError(f"Unknown features {missing}")
+        self.features = list(features)
+        self.position = {feature: i for i, feature in enumerate(self.features)}
+        self.values = np.column_stack([
+            pd.to_numeric(frame[feature], errors="coerce").to_numpy(dtype=float) for feature in self.features
+        ]) if self.features else np.empty((len(frame), 0))
+        self.values.flags.writeable = False
+        self.finite = np.isfinite(self.values)
+
+
+class ScreeningResult:
+    """
+    Outcome of a rule set on every row of a store: `passed` and `evaluated` are
+    (rows x rules) boolean matrices. A row is evaluated by a rule when every feature the
+    rule uses has a value there, or when one branch of an "any" already passes; a
+    condition on a missing value never passes.
+    """
+
+    def __init__(self, store, names: list, passed: np.ndarray, evaluated: np.ndarray):
+        self.store = store
+        self.names = list(names)
+        self.passed = passed
+        self.evaluated = evaluated
+
+    def _rows(self, rows) -> np.ndarray:
+        return np.arange(self.passed.shape[0]) if rows is None else np.asarray(rows)
+
+    def counts(self, rows=None) -> pd.DataFrame:
+        """
+        Per rule: rows passing, rows evaluated and the pass rate, over `rows` (default all)
+        """
+        rows = self._rows(rows)
+        passed = self.passed[rows].sum(axis=0)
+        evaluated = self.evaluated[rows].sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = np.where(evaluated > 0, passed / evaluated, np.nan)
+        return pd.DataFrame({"valid_rows": passed, "total_rows_used": evaluated, "valid_share": rate},
+                            index=pd.Index(self.names, name="rule"))
+
+    def counts_by(self, column: str = "company_name", rows=None) -> pd.DataFrame:
+        """
+        Rows passing each rule per value of a key column (e.g. per bank or per year_quarter)
+        """
+        rows = self._rows(rows)
+        codes, labels = pd.factorize(self.store.frame[column].to_numpy()[rows], sort=True)
+        counts = np.zeros((len(labels), len(self.names)), dtype=np.int64)
+        for i in range(len(self.names)):
+            counts[:, i] = np.bincount(codes, weights=self.passed[rows, i], minlength=len(labels))
+        return pd.DataFrame(counts, index=pd.Index(labels, name=column), columns=self.names)
+
+    def matrix(self, rule: str, rows=None) -> pd.DataFrame:
+        """
+        Bank x year_quarter pass/fail matrix of one rule (nullable boolean, <NA> where the
+        rule could not be evaluated or the bank has no row for that quarter)
+        """
+        i = self.names.index(rule)
+        rows = self._rows(rows)
+        frame = self.store.frame
+        companies = frame["company_name"].cat.codes.to_numpy()[rows]
+        periods, period_codes = np.unique(frame["sort_key"].to_numpy()[rows], return_inverse=True)
+
+        # (bank x quarter) cells, -1 where there is no evaluated row
+        grid = np.full((len(self.store.companies), len(periods)), -1, dtype=np.int8)
+        grid[companies, period_codes] = np.where(self.evaluated[rows, i], self.passed[rows, i], -1)
+
+        present = np.unique(companies)
+        grid = grid[present]
+        labels = pd.Series(frame["year_quarter"].to_numpy()[rows]).groupby(period_codes).first().to_numpy()
+        return pd.DataFrame(
+            {label: pd.arrays.BooleanArray(grid[:, j] == 1, grid[:, j] < 0) for j, label in enumerate(labels)},
+            index=pd.Index(np.asarray(self.store.companies, dtype=object)[present], name="company_name"),
+        ).rename_axis(columns="year_quarter")
+
+
+def _evaluate(node: dict, leaf_passed: np.ndarray, leaf_evaluated: np.ndarray, counter: list) -> tuple:
+    """
+    Combine the leaf columns bottom-up, leaves are consumed in the order _collect_leaves found them.
+    An "any" passes as soon as one child passes, even if another child is missing a value.
+    """
+    if "all" in node or "any" in node:
+        children = [_evaluate(child, leaf_passed, leaf_evaluated, counter) for child in node.get("all", node.get("any"))]
+        passed = np.column_stack([child[0] for child in children])
+        evaluated = np.column_stack([child[1] for child in children]).all(axis=1)
+        if "all" in node:
+            return passed.all(axis=1) & evaluated, evaluated
+        passed = passed.any(axis=1)
+        return passed, passed | evaluated
+    i = counter[0]
+    counter[0] += 1
+    return leaf_passed[:, i], leaf_evaluated[:, i]
+
+
+def screen(store, rules: dict) -> ScreeningResult:
+    """
+    Evaluate a rule set on every row of the store. Cached by the hash of the rule set and
+    the store version, so re-applying the same rules is a dictionary lookup; restricting
+    to a page's filtered rows is done on the result (counts(rows) / matrix(rule, rows)).
+    """
+    # (name, rule) pairs: the order of the rules is the column order of the result,
+    # canonical_key would sort the names of a dict
+    key = canonical_key(kind="screen", rules=list(rules.items()), data_version=store.version)
+    return _CACHE.get_or_build(key, lambda: _screen(store, rules))
+
+
+def _screen(store, rules: dict) -> ScreeningResult:
+    leaves = []
+    for rule in rules.values():
+        _collect_leaves(rule, leaves)
+
+    n_rows = len(store.frame)
+    if not leaves:
+        # Empty rule set: no rule columns
+        return ScreeningResult(store, [], np.zeros((n_rows, 0), dtype=bool), np.zeros((n_rows, 0), dtype=bool))
+
+    features = rule_features(rules)
+    matrix = _CACHE.get_or_build(
+        canonical_key(kind="feature_matrix", features=sorted(features), data_version=store.version),
+        lambda: FeatureMatrix(store, sorted(features)),
+    )
+
+    # Every leaf as an interval, compared against its feature column in one broadcast
+    columns = np.array([matrix.position[leaf["feature"]] for leaf in leaves], dtype=np.intp)
+    low, high, low_inclusive, high_inclusive = (np.array(values) for values in zip(*map(_interval, leaves)))
+    x = matrix.values[:, columns]
+    leaf_evaluated = matrix.finite[:, columns]
+    with np.errstate(invalid="ignore"):
+        leaf_passed = (
+            ((x > low) | (low_inclusive & (x == low))) &
+            ((x < high) | (high_inclusive & (x == high))) &
+            leaf_evaluated
+        )
+
+    counter = [0]
+    passed, evaluated = [], []
+    for rule in rules.values():
+        rule_passed, rule_evaluated = _evaluate(rule, leaf_passed, leaf_evaluated, counter)
+        passed.append(rule_passed)
+        evaluated.append(rule_evaluated)
+
+    return ScreeningResult(store, list(rules), np.column_stack(passed), np.column_stack(evaluated))
+
+
+def screening_cache_stats() -> dict:
+    return _CACHE.stats()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+
+# Folder holding the columnar snapshots (ignored by git)
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """
+    Return the sha256 hex digest of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_entry(path: Path) -> dict:
+    stat = path.stat()
+    return {"path": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def sources_unchanged(sources: List[Path], manifest: dict) -> bool:
+    """
+    Compare the sources against the manifest of the snapshot.
+    mtime + size is checked first, the sha256 is only computed for files whose
+    mtime changed (e.g. a fresh git checkout), so a warm load does not hash anything.
+    """
+    entries = manifest.get("sources", [])
+    if len(entries) != len(sources):
+        return False
+
+    touched = False
+    for path, entry in zip(sources, entries):
+        if entry.get("path") != str(path):
+            return False
+        current = stat_entry(path)
+        if current["mtime_ns"] == entry.get("mtime_ns") and current["size"] == entry.get("size"):
+            continue
+        if file_sha256(path) != entry.get("sha256"):
+            return False
+        # Same content with a new mtime, remember the new mtime for next time
+        entry.update(current)
+        touched = True
+
+    if touched:
+        manifest["touched"] = True
+    return True
+
+
+def _write_atomic(write: Callable[[str], None], target: Path) -> None:
+    # Unique per thread too: Streamlit sessions are threads of one process
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(str(tmp))
+        os.replace(tmp, target)
+    except BaseException:
+        # Do not leave a half-written file behind
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def load_snapshot(name: str, sources: List[Path], loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Serve `loader()` from a Parquet snapshot keyed by the sources' mtime + sha256.
+
+    The loader (e.g. the openpyxl parse of the summarized workbooks) only runs when
+    one of the sources actually changed, otherwise the snapshot is read back.
+    """
+    sources = [Path(p) for p in sources]
+    snapshot_path = CACHE_DIR / f"{name}.parquet"
+    manifest_path = CACHE_DIR / f"{name}.json"
+
+    if snapshot_path.exists() and manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            if sources_unchanged(sources, manifest):
+                df = pd.read_parquet(snapshot_path)
+                if manifest.pop("touched", False):
+                    _write_atomic(lambda p: Path(p).write_text(json.dumps(manifest)), manifest_path)
+                return df
+        except (OSError, ValueError, TypeError, ImportError):
+            # Broken snapshot or no parquet engine, fall through to a rebuild
+            pass
+
+    df = loader()
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "sources": [dict(stat_entry(p), sha256=file_sha256(p)) for p in sources],
+        }
+        _write_atomic(lambda p: df.to_parquet(p, index=False), snapshot_path)
+        _write_atomic(lambda p: Path(p).write_text(json.dumps(manifest)), manifest_path)
+    except (OSError, ValueError, TypeError, ImportError):
+        # Read-only filesystem, no parquet engine or a column Arrow cannot type (e.g. numbers
+        # mixed with a "-" placeholder, ArrowTypeError is a TypeError): serve the fresh frame
+        # without caching
+        pass
+
+    return df
+
+
+def clear_snapshot(name: str) -> None:
+    """
+    Remove a snapshot so the next load re-parses the sources
+    """
+    for suffix in (".parquet", ".json"):
+        path = CACHE_DIR / f"{name}{suffix}"
+        if path.exists():
+            path.unlink()
@@ -0,0 +1,310 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from snapshot_cache import file_sha256, sources_unchanged, stat_entry
+
+# Root of the statement dataset: Parquet files partitioned hive-style by
+# statement / kbmi_type / year, e.g. store/statement=rasio/kbmi_type=KBMI 4/year=2024/part-00002.parquet
+STORE_DIR = Path(__file__).parent / "store"
+
+# Partition columns, in directory order (a statement without kbmi_type, e.g. aset, is
+# only partitioned by year). They are encoded in the path, not stored in the files.
+PARTITION_COLUMNS = ("kbmi_type", "year")
+
+# Directory name of a missing partition value (same convention as pyarrow / Hive)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Name of the per-statement manifest listing the committed files
+MANIFEST = "_manifest.json"
+
+# Serializes the writes of the sessions of one process (Streamlit sessions are threads):
+# a manifest update is a read-modify-write and part names come from its generation.
+# Reentrant, so a caller can hold it around a check and the update it triggers.
+STORE_LOCK = threading.RLock()
+
+
+def statement_dir(statement: str) -> Path:
+    return STORE_DIR / f"statement={statement}"
+
+
+def read_manifest(statement: str) -> dict:
+    """
+    Manifest of a statement dataset: the committed files (with their partition values,
+    columns and write generation), the column order, the sha256 of the ingested source
+    workbooks and a generation counter bumped on every write.
+    An empty manifest means the dataset does not exist yet.
+    """
+    path = statement_dir(statement) / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _tmp_path(path: Path) -> Path:
+    """
+    Temp file next to `path`, unique per process and thread
+    """
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_manifest(statement: str, manifest: dict) -> None:
+    path = statement_dir(statement) / MANIFEST
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, path)
+
+
+def store_exists(statement: str) -> bool:
+    return bool(read_manifest(statement).get("files"))
+
+
+def store_generation(statement: str) -> int:
+    """
+    Generation of the dataset, cheap to poll: it changes every time rows are upserted
+    """
+    return read_manifest(statement).get("generation", 0)
+
+
+def _selected(entry: dict, filters: dict) -> bool:
+    """
+    Partition pruning: keep a file only if its partition values match every filter
+    """
+    for column, values in filters.items():
+        if values is None or column not in entry:
+            continue
+        if entry[column] not in values:
+            return False
+    return True
+
+
+def select_files(manifest: dict, **filters) -> list:
+    """
+    Manifest entries of the files matching the partition filters, in write order
+    """
+    filters = {column: [values] if pd.api.types.is_scalar(values) else list(values)
+               for column, values in filters.items() if values is not None}
+    entries = (entry for entry in manifest.get("files", []) if _selected(entry, filters))
+    return sorted(entries, key=lambda entry: entry["generation"])
+
+
+def read_store(statement: str, columns: list = None, **filters) -> pd.DataFrame:
+    """
+    Read a statement dataset with column and partition pruning.
+
+    `columns` limits the columns read from the files (company_date is always kept),
+    `filters` select partition values, e.g. kbmi_type=["KBMI 4"], year=[2023, 2024]:
+    files of other partitions are not opened. Files are read in write order and a
+    later row replaces an earlier one with the same company_date (upsert semantics).
+    Returns None when the dataset does not exist.
+    """
+    manifest = read_manifest(statement)
+    if not manifest.get("files"):
+        return None
+    entries = select_files(manifest, **filters)
+
+    order = manifest["columns"]
+    if columns is not None:
+        wanted = set(columns) | {"company_date"}
+        order = [column for column in order if column in wanted]
+
+    # Read as Arrow tables and convert once: per-file pandas conversions dominate small reads
+    tables = []
+    for entry in entries:
+        file_columns = [column for column in order if column in entry["columns"]]
+        table = pq.read_table(statement_dir(statement) / entry["path"], columns=file_columns)
+        for column in PARTITION_COLUMNS:
+            if column in entry and column in order:
+                table = table.append_column(column, pa.array([entry[column]] * table.num_rows))
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=order)
+
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    if len(tables) > 1:
+        df = df.drop_duplicates(subset="company_date", keep="last", ignore_index=True)
+    return df[[column for column in order if column in df.columns]]
+
+
+def store_keys(statement: str) -> set:
+    """
+    company_date keys already in the dataset, read from that column only
+    """
+    df = read_store(statement, columns=["company_date"])
+    return set() if df is None else set(df["company_date"])
+
+
+def _partition_path(values: dict) -> str:
+    return "/".join(f"{column}={NULL_PARTITION if values[column] is None else values[column]}"
+                    for column in PARTITION_COLUMNS if column in values)
+
+
+def _write_partitions(statement: str, generation: int, df: pd.DataFrame) -> list:
+    """
+    Write one file per (kbmi_type, year) partition of `df`, returns their manifest entries
+    """
+    keys = [column for column in PARTITION_COLUMNS if column in df.columns]
+    entries = []
+    for values, part in df.groupby(keys if len(keys) > 1 else keys[0], sort=True, dropna=False):
+        values = dict(zip(keys, values if isinstance(values, tuple) else (values,)))
+        values = {column: None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+                  for column, value in values.items()}
+
+        folder = statement_dir(statement) / _partition_path(values)
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"part-{generation:05d}.parquet"
+        tmp = _tmp_path(folder / name)
+        try:
+            part.drop(columns=keys).to_parquet(tmp, index=False)
+            os.replace(tmp, folder / name)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        entry = {"path": f"{_partition_path(values)}/{name}", "generation": generation,
+                 "columns": [column for column in part.columns if column not in keys]}
+        entries.append(dict(entry, **values))
+    return entries
+
+
+def append_part(statement: str, df: pd.DataFrame, sources: dict = None) -> list:
+    """
+    Commit `df` as new files of the dataset: the files are written first, then the
+    manifest is replaced atomically, so readers see either the old or the new dataset.
+    The cost of an append only depends on the size of `df`.
+    """
+    with STORE_LOCK:
+        manifest = read_manifest(statement)
+        generation = manifest.get("generation", 0) + 1
+        entries = _write_partitions(statement, generation, df)
+
+        manifest["files"] = manifest.get("files", []) + entries
+        manifest["columns"] = manifest.get("columns", []) + [c for c in df.columns if c not in manifest.get("columns", [])]
+        manifest["generation"] = generation
+        if sources:
+            manifest["sources"] = dict(manifest.get("sources", {}), **sources)
+        write_manifest(statement, manifest)
+    return entries
+
+
+def compact_store(statement: str) -> None:
+    """
+    Rewrite the dataset with one file per partition, keeping only the latest row of every key
+    """
+    with STORE_LOCK:
+        df = read_store(statement)
+        if df is None:
+            return
+        manifest = read_manifest(statement)
+        old_files = [statement_dir(statement) / entry["path"] for entry in manifest["files"]]
+
+        generation = manifest["generation"] + 1
+        manifest["files"] = _write_partitions(statement, generation, df)
+        manifest["generation"] = generation
+        write_manifest(statement, manifest)
+
+    for path in old_files:
+        path.unlink(missing_ok=True)
+
+
+def seed_store(statement: str, sources: List[Path], loader: Callable[[], pd.DataFrame]) -> None:
+    """
+    (Re)build the dataset from `loader()` (the summarized workbooks). The previous files
+    are dropped and the ingested sources forgotten, so the next ingest re-scans them.
+    """
+    with STORE_LOCK:
+        manifest = read_manifest(statement)
+        old_files = [statement_dir(statement) / entry["path"] for entry in manifest.get("files", [])]
+
+        df = loader()
+        generation = manifest.get("generation", 0) + 1
+        manifest = {
+            "files": _write_partitions(statement, generation, df),
+            "columns": list(df.columns),
+            "generation": generation,
+            "seed": [dict(stat_entry(Path(p)), sha256=file_sha256(p)) for p in sources],
+            "sources": {},
+        }
+        write_manifest(statement, manifest)
+
+    for path in old_files:
+        path.unlink(missing_ok=True)
+
+
+def ensure_store(statement: str, sources: List[Path], loader: Callable[[], pd.DataFrame]) -> bool:
+    """
+    Make sure the dataset exists and was seeded from the current `sources`: it is
+    (re)seeded when missing or when one of the summarized workbooks changed.
+    Returns False when the dataset cannot be written (e.g. read-only filesystem, or a
+    column Arrow cannot type such as numbers mixed with a "-" placeholder).
+    """
+    sources = [Path(p) for p in sources]
+    with STORE_LOCK:
+        manifest = read_manifest(statement)
+        if manifest.get("files"):
+            seed = {"sources": manifest.get("seed", [])}
+            if sources_unchanged(sources, seed):
+                if seed.pop("touched", False):
+                    manifest["seed"] = seed["sources"]
+                    write_manifest(statement, manifest)
+                return True
+
+        try:
+            seed_store(statement, sources, loader)
+        except (OSError, ValueError, ImportError, pa.ArrowException):
+            return False
+    return True
+
+
+def derived_current(statement: str, base: str, features: list) -> bool:
+    """
+    True when `statement`, a dataset computed from the `base` dataset (e.g. the peer rank
+    cube of rasio), exists, covers `features` and matches the current generation of `base`
+    """
+    manifest = read_manifest(statement)
+    return (bool(manifest.get("files"))
+            and manifest.get("features") == list(features)
+            and manifest.get("base_generation") == store_generation(base))
+
+
+def mark_derived(statement: str, base: str, features: list, base_generation: int) -> None:
+    """
+    Record which features and which generation of `base` the dataset was computed from
+    """
+    with STORE_LOCK:
+        manifest = read_manifest(statement)
+        manifest["features"] = list(features)
+        manifest["base_generation"] = base_generation
+        write_manifest(statement, manifest)
+
+
+def compact_derived(statement: str, base: str) -> None:
+    """
+    Compact a derived dataset after its base was compacted: the base rows did not
+    change, so the dataset stays valid for the new generation of the base
+    """
+    with STORE_LOCK:
+        compact_store(statement)
+        manifest = read_manifest(statement)
+        manifest["base_generation"] = store_generation(base)
+        write_manifest(statement, manifest)
+
+
+def export_excel(statement: str, path, columns: list = None, **filters) -> Path:
+    """
+    Write (part of) a statement dataset as an Excel workbook, the layout of the summarized workbooks
+    """
+    df = read_store(statement, columns=columns, **filters)
+    if df is None:
+        raise FileNotFoundError(f"No '{statement}' dataset under {STORE_DIR}")
+    path = Path(path)
+    df.to_excel(path, index=False)
+    return path
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+# Percentiles shown in the summary tables and overlay lines of the pages
+DEFAULT_PERCENTILES = (5, 10, 15, 25, 50, 75, 85, 90, 95)
+
+
+def _lerp(a, b, t):
+    """
+    Linear interpolation exactly like numpy's percentile (so results are bit-identical
+    to np.percentile / Series.quantile)
+    """
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def _sorted_percentiles(sorted_values: np.ndarray, starts, counts, percentiles) -> np.ndarray:
+    """
+    Percentiles of already sorted groups: group g is sorted_values[starts[g]:starts[g] + counts[g]].
+    Returns an array (groups x percentiles), NaN for empty groups.
+    """
+    starts = np.asarray(starts)[:, None]
+    counts = np.asarray(counts)[:, None]
+    q = np.asarray(percentiles, dtype=float)[None, :] / 100
+
+    index = (counts - 1) * q
+    below = np.floor(index)
+    gamma = index - below
+    below = below.astype(np.int64)
+    above = np.minimum(below + 1, counts - 1)
+
+    empty = (counts == 0).ravel()
+    lo = np.clip(starts + below, 0, max(len(sorted_values) - 1, 0))
+    hi = np.clip(starts + above, 0, max(len(sorted_values) - 1, 0))
+
+    if len(sorted_values) == 0:
+        return np.full((len(starts), q.shape[1]), np.nan)
+
+    result = _lerp(sorted_values[lo], sorted_values[hi], gamma)
+    result[empty] = np.nan
+    return result
+
+
+def summary_stats(values, percentiles=DEFAULT_PERCENTILES) -> dict:
+    """
+    All summary statistics of one series from a single sort: count, min, max, mean,
+    std (ddof=1, like pandas) and every requested percentile (keyed by the percentile number).
+    NaN values are ignored.
+    """
+    x = np.asarray(values, dtype=float)
+    x = x[~np.isnan(x)]
+    n = len(x)
+
+    stats = {"count": n}
+    if n == 0:
+        stats.update({"min": np.nan, "max": np.nan, "mean": np.nan, "std": np.nan})
+        stats.update({p: np.nan for p in percentiles})
+        return stats
+
+    # Moments in the original order (same summation order as pandas), then one sort
+    mean = x.sum() / n
+    stats["mean"] = mean
+    stats["std"] = np.sqrt(((x - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+
+    x = np.sort(x)
+    stats["min"] = x[0]
+    stats["max"] = x[-1]
+
+    quantiles = _sorted_percentiles(x, [0], [n], percentiles)[0]
+    stats.update(dict(zip(percentiles, quantiles)))
+    return stats
+
+
+def grouped_summary_stats(values, groups, percentiles=DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    summary_stats for every group in one pass: a single lexsort by (group, value),
+    then moments with bincount and percentiles with vectorized index arithmetic.
+
+    `groups` can be any array of labels (e.g. company_name or sort_key); the result
+    has one row per group (sorted) and the columns count/min/max/mean/std/<percentiles>.
+    """
+    x = np.asarray(values, dtype=float)
+    codes, labels = pd.factorize(np.asarray(groups), sort=True)
+    keep = ~np.isnan(x) & (codes >= 0)
+    x, codes = x[keep], codes[keep]
+    n_groups = len(labels)
+
+    order = np.lexsort((x, codes))
+    x, codes = x[order], codes[order]
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    has_rows = counts > 0
+
+    sums = np.bincount(codes, weights=x, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        sq_dev = np.bincount(codes, weights=(x - mean[codes]) ** 2, minlength=n_groups)
+        std = np.sqrt(sq_dev / (counts - 1))
+    std[counts < 2] = np.nan
+
+    if len(x):
+        first_value = x[np.clip(starts, 0, len(x) - 1)]
+        last_value = x[np.clip(starts + counts - 1, 0, len(x) - 1)]
+    else:
+        first_value = last_value = np.full(n_groups, np.nan)
+
+    result = pd.DataFrame({
+        "count": counts,
+        "min": np.where(has_rows, first_value, np.nan),
+        "max": np.where(has_rows, last_value, np.nan),
+        "mean": mean,
+        "std": std,
+    }, index=pd.Index(labels, name="group"))
+
+    quantiles = _sorted_percentiles(x, starts, counts, percentiles)
+    for i, p in enumerate(percentiles):
+        result[p] = quantiles[:, i]
+    return result
+
+
+def grouped_histogram(values, group_codes, n_groups: int, bins="auto") -> tuple:
+    """
+    Stacked-histogram counts for every group in one pass: the bin edges are computed
+    once on all values (shared by every group, same rule as np.histogram_bin_edges),
+    then each value gets a flat (group, bin) cell and a single bincount fills the matrix.
+
+    `group_codes` are integer codes in [0, n_groups) (e.g. company_name.cat.codes).
+    Returns (edges, counts) with counts shaped (n_groups, n_bins); NaN values are ignored.
+    """
+    x = np.asarray(values, dtype=float)
+    codes = np.asarray(group_codes)
+    keep = ~np.isnan(x) & (codes >= 0)
+    x, codes = x[keep], codes[keep].astype(np.int64)
+
+    if len(x) == 0:
+        return np.array([0.0, 1.0]), np.zeros((n_groups, 1), dtype=np.int64)
+
+    edges = np.histogram_bin_edges(x, bins=bins)
+    n_bins = len(edges) - 1
+
+    # Bins are uniform, so the bin index is arithmetic (like np.histogram), then nudged by
+    # one where rounding put a value on the wrong side of an edge. Half-open bins, the last
+    # one also holds the right edge.
+    span = edges[-1] - edges[0]
+    if span > 0:
+        bin_index = ((x - edges[0]) * (n_bins / span)).astype(np.int64)
+        bin_index = np.clip(bin_index, 0, n_bins - 1)
+        bin_index[x < edges[bin_index]] -= 1
+        bin_index[(x >= edges[bin_index + 1]) & (bin_index != n_bins - 1)] += 1
+    else:
+        bin_index = np.zeros(len(x), dtype=np.int64)
+    counts = np.bincount(codes * n_bins + bin_index, minlength=n_groups * n_bins)
+    return edges, counts.reshape(n_groups, n_bins)
+
+
+def grouped_box_stats(values, group_codes, n_groups: int, whisker: float = 1.5) -> tuple:
+    """
+    Boxplot statistics for every group in one pass: a single lexsort by (group, value),
+    quartiles with the same interpolation as the summary tables, whiskers at the furthest
+    values within `whisker` x IQR of the box, and everything beyond them as outliers.
+
+    `group_codes` are integer codes in [0, n_groups). Returns (box, outlier_codes, outlier_values):
+    `box` has one row per non-empty group (indexed by code) with count/mean/q1/median/q3/
+    lowerfence/upperfence, the outliers are flat arrays sorted by (group, value).
+    """
+    x = np.asarray(values, dtype=float)
+    codes = np.asarray(group_codes)
+    keep = ~np.isnan(x) & (codes >= 0)
+    x, codes = x[keep], codes[keep].astype(np.int64)
+
+    order = np.lexsort((x, codes))
+    x, codes = x[order], codes[order]
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    present = np.flatnonzero(counts)
+    counts, starts = counts[present], starts[present]
+
+    q1, median, q3 = _sorted_percentiles(x, starts, counts, (25, 50, 75)).T
+    mean = np.bincount(codes, weights=x, minlength=n_groups)[present] / counts
+
+    # Fences per row through the group position, rows inside them are contiguous per group
+    iqr = q3 - q1
+    group_pos = np.repeat(np.arange(len(present)), counts)
+    low_fence = (q1 - whisker * iqr)[group_pos]
+    high_fence = (q3 + whisker * iqr)[group_pos]
+    inside = (x >= low_fence) & (x <= high_fence)
+
+    # The median always lies inside the fences, so every group has an inside value
+    lowerfence = np.minimum.reduceat(np.where(inside, x, np.inf), starts) if len(x) else np.empty(0)
+    upperfence = np.maximum.reduceat(np.where(inside, x, -np.inf), starts) if len(x) else np.empty(0)
+
+    box = pd.DataFrame({
+        "count": counts,
+        "mean": mean,
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": lowerfence,
+        "upperfence": upperfence,
+    }, index=pd.Index(present, name="group"))
+    return box, codes[~inside], x[~inside]
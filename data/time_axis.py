@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# Layout of a "YYYY_qN" label, plus one byte that must stay empty
+_LABEL_WIDTH = 8
+_YEAR_WEIGHTS = np.array([1000, 100, 10, 1], dtype=np.int32)
+
+
+def quarter_period(year_quarter) -> np.ndarray:
+    """
+    Convert "YYYY_qN" labels into an int32 period index (year * 4 + quarter),
+    the same ordering the old per-row quarter_sort_key produced.
+
+    The labels are viewed as a fixed-width byte matrix and the digits are read with
+    one vectorized operation, so the cost stays flat per row however long the history is.
+    """
+    labels = np.asarray(year_quarter, dtype=f"S{_LABEL_WIDTH}")
+    chars = labels.view(np.uint8).reshape(-1, _LABEL_WIDTH).astype(np.int32)
+
+    well_formed = (
+        (chars[:, 4] == ord("_")) & (chars[:, 5] == ord("q")) & (chars[:, 7] == 0) &
+        (chars[:, :4] >= ord("0")).all(axis=1) & (chars[:, :4] <= ord("9")).all(axis=1) &
+        (chars[:, 6] >= ord("1")) & (chars[:, 6] <= ord("4"))
+    )
+    if not well_formed.all():
+        bad = np.asarray(year_quarter)[~well_formed][:3]
+        raise ValueError(f"year_quarter labels must look like 'YYYY_qN' with N in 1-4, got {list(bad)}")
+
+    year = (chars[:, :4] - ord("0")) @ _YEAR_WEIGHTS
+    quarter = chars[:, 6] - ord("0")
+    return (year * 4 + quarter).astype(np.int32)
+
+
+def period_to_year_quarter(period) -> tuple:
+    """
+    Inverse of quarter_period: returns (year, quarter) arrays
+    """
+    period = np.asarray(period, dtype=np.int32)
+    year = (period - 1) // 4
+    quarter = period - year * 4
+    return year, quarter
+
+
+def period_labels(period) -> list:
+    """
+    "YYYY_qN" labels for an array of periods, e.g. for a chart category order
+    """
+    year, quarter = period_to_year_quarter(period)
+    return [f"{y}_q{q}" for y, q in zip(year.tolist(), quarter.tolist())]
+
+
+def sort_by_company_period(df: pd.DataFrame, company_col: str = "company_name",
+                           period_col: str = "sort_key") -> pd.DataFrame:
+    """
+    Physically sort the frame by (company, period), so every company is one
+    contiguous block that is itself in time order
+    """
+    company = df[company_col]
+    company_codes = company.cat.codes.to_numpy() if hasattr(company, "cat") else pd.factorize(company, sort=True)[0]
+    order = np.lexsort((df[period_col].to_numpy(), company_codes))
+    return df.iloc[order].reset_index(drop=True)
+
+
+def block_offsets(codes: np.ndarray, n_blocks: int) -> np.ndarray:
+    """
+    Start offset of every block in a sorted code array, plus the total length at the end:
+    rows of block i are offsets[i]:offsets[i + 1]
+    """
+    return np.searchsorted(codes, np.arange(n_blocks + 1), side="left")
+
+
+def sorted_range(values: np.ndarray, low=None, high=None, start: int = 0, stop: int = None) -> slice:
+    """
+    Slice of the sorted `values[start:stop]` that falls inside [low, high] (inclusive),
+    found with two binary searches instead of a full boolean scan
+    """
+    stop = len(values) if stop is None else stop
+    window = values[start:stop]
+    lo = 0 if low is None else int(np.searchsorted(window, low, side="left"))
+    hi = len(window) if high is None else int(np.searchsorted(window, high, side="right"))
+    return slice(start + lo, start + max(lo, hi))
+
+
+def date_bounds(start_date=None, end_date=None) -> tuple:
+    """
+    Convert widget dates (datetime.date) into inclusive datetime64[ns] bounds once:
+    start of `start_date` and last nanosecond of `end_date`, same result as comparing
+    `.dt.date` but without turning the column into Python date objects. None stays open.
+    """
+    low = None if start_date is None else np.datetime64(start_date, "D").astype("datetime64[ns]")
+    high = None if end_date is None else (np.datetime64(end_date, "D") + 1).astype("datetime64[ns]") - np.timedelta64(1, "ns")
+    return low, high
+
+
+class DateIndex:
+    """
+    Sorted view of a datetime64 column answering date-range filters with binary search
+    """
+
+    def __init__(self, dates):
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.n_rows = len(dates)
+        self.order = np.argsort(dates, kind="stable")
+        self.sorted = dates[self.order]
+
+    def rows(self, start_date=None, end_date=None) -> np.ndarray:
+        """
+        Row positions (ascending) whose date falls inside [start_date, end_date]
+        """
+        low, high = date_bounds(start_date, end_date)
+        return np.sort(self.order[sorted_range(self.sorted, low, high)])
+
+    def mask(self, start_date=None, end_date=None) -> np.ndarray:
+        """
+        Boolean row mask of the dates inside [start_date, end_date]
+        """
+        low, high = date_bounds(start_date, end_date)
+        result = np.zeros(self.n_rows, dtype=bool)
+        result[self.order[sorted_range(self.sorted, low, high)]] = True
+        return result
@@ -0,0 +1,12 @@
+"""
+Financial statement extractor: the functions of financial_statement_extractor.ipynb
+as an importable package, plus a parallel batch runner (python -m data_extractor.extractor).
+"""
+from .banks import BANKS, STATEMENTS, statement_spec
+from .batch import discover_pdfs, extract_statement, process_pdf, run_batch
+from .extraction_cache import EXTRACTOR_VERSION, ExtractionCache, extraction_key
+from .locate import PageLocator, file_sha256, find_pages, page_texts
+from .merge import merge_2_rows, merge_3_rows, merge_next_rows, merge_rows, normalize_text
+from .ocr import OcrCache, ocr_statement, percent_texts_frame, render_region, table_region
+from .tables import OUTPUT_FORMATS, cut_dataframe_target, extract_pdf, read_table, search_page, write_table
+from .tune import ParamsStore, param_grid, tune_camelot_params
@@ -0,0 +1,108 @@
+"""
+Batch extraction of the quarterly financial statement PDFs.
+
+Run from the repository root, e.g.:
+    python -m data_extractor.extractor --root data_extractor --workers 8
+    python -m data_extractor.extractor --root data_extractor --bank Seabank --statement rasio
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from .banks import BANKS, STATEMENTS
+from .batch import discover_pdfs, run_batch
+from .locate import DEFAULT_CACHE_DIR
+from .ocr import DEFAULT_ENGINE
+from .tables import OUTPUT_FORMATS
+
+
+def positive_int(value: str) -> int:
+    """
+    argparse type of the worker counts: an integer >= 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m data_extractor.extractor",
+        description="Extract the rasio / aset / liabilitas tables of every <Bank>q<N><YYYY>.pdf under a root folder.",
+    )
+    parser.add_argument("--root", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="folder searched recursively for the PDFs (default: data_extractor)")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count(),
+                        help="worker processes, one PDF per worker (default: CPU count, 1 = no pool)")
+    parser.add_argument("--ocr-workers", type=positive_int, default=1,
+                        help="OCR worker processes for image-based tables, each loads the model once (default: 1)")
+    parser.add_argument("--ocr-engine", choices=["paddle", "tesseract"], default=DEFAULT_ENGINE)
+    parser.add_argument("--statement", action="append", choices=STATEMENTS, dest="statements",
+                        help="statement to extract, repeatable (default: all)")
+    parser.add_argument("--bank", action="append", choices=sorted(BANKS), dest="banks",
+                        help="bank file prefix to extract, repeatable (default: all)")
+    parser.add_argument("--output-dir", default=None,
+                        help="write the extracted tables here instead of next to each PDF")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet", dest="output_format",
+                        help="file format of the extracted tables (default: parquet, xlsx for Excel)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="cache folder for the located pages and extracted tables (default: data_extractor/.cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore the extraction cache and re-extract every PDF")
+    parser.add_argument("--all-pages", action="store_true",
+                        help="skip the text-layer locate step and let camelot parse every page")
+    parser.add_argument("--list", action="store_true", help="only list the PDFs that would be processed")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s %(message)s")
+    # camelot logs every parsed page at INFO
+    logging.getLogger("camelot").setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    if args.list:
+        for job in discover_pdfs(args.root, args.banks):
+            print(f"{job['bank']:<12} {job['year']} q{job['quarter']}  {job['path']}")
+        return 0
+
+    start = time.perf_counter()
+    reports = run_batch(
+        args.root,
+        workers=args.workers,
+        statements=tuple(args.statements or STATEMENTS),
+        banks=args.banks,
+        output_dir=args.output_dir,
+        locate=not args.all_pages,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        ocr_workers=args.ocr_workers,
+        ocr_engine=args.ocr_engine,
+        output_format=args.output_format,
+    )
+
+    failed = 0
+    for report in reports:
+        if "error" in report:
+            failed += 1
+            print(f"FAILED  {report['path']}: {report['error']}")
+            continue
+        if "failed" in report["results"].values():
+            failed += 1
+        summary = ", ".join(f"{statement}: {os.path.basename(result)}" for statement, result in report["results"].items())
+        cached = f" (cached: {', '.join(report['cached'])})" if report["cached"] else ""
+        print(f"{report['seconds']:6.1f}s {report['path']} -> {summary}{cached}")
+
+    print(f"{len(reports)} PDFs in {time.perf_counter() - start:.1f}s with {args.workers} workers, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Extraction settings per bank and statement, taken from the per-bank notebook cells.
+
+BANKS[<file prefix>][<statement>] is a list of variants. A variant applies to the PDFs
+whose stem is in "files" (None = every PDF of the bank); the first matching variant is used.
+A PDF with no matching variant is skipped for that statement.
+
+Variant keys:
+    target_value : exact cell text of the table header searched by search_page
+    row_range    : rows searched for the header (inclusive)
+    col_range    : columns searched for the header (inclusive)
+    camelot      : keyword arguments for camelot.read_pdf (stream flavor)
+    steps        : merge steps applied in order, (merge function name, values, col_index)
+    cut          : column index for cut_dataframe_target, or None
+    ocr          : only for image-based tables, read by the OCR stage instead of camelot:
+                   panel title and last label of the table on the text layer, and the DPI
+"""
+
+# Statements extracted from every PDF, also the prefix of the output files
+STATEMENTS = ("rasio", "aset", "liabilitas")
+
+ROW_RANGE = (0, 10)
+COL_RANGE = (0, 2)
+
+
+def _variant(target_value, edge_tol, row_tol, steps=(), cut=None, files=None, row_range=ROW_RANGE):
+    return {
+        "target_value": target_value,
+        "row_range": row_range,
+        "col_range": COL_RANGE,
+        "camelot": {"edge_tol": edge_tol, "row_tol": row_tol, "strip_text": "\n"},
+        "steps": list(steps),
+        "cut": cut,
+        "files": None if files is None else set(files),
+    }
+
+
+def _ocr_variant(target_value, start, end, dpi=200, files=None):
+    return {
+        "target_value": target_value,
+        "ocr": {"start": start, "end": end, "dpi": dpi},
+        "files": None if files is None else set(files),
+    }
+
+
+BCA_DIGITAL_RASIO_1_ROW = [
+    "RASIO",
+    "Kewajiban Penyediaan Modal",
+    "Aset produktif bermasalah terhadap",
+    "Biaya Operasional terhadap",
+    "Posisi Devisa Neto (PDN) secara",
+]
+BCA_DIGITAL_RASIO_2_ROW = [
+    "Aset produktif bermasalah dan aset",
+    "Cadangan Kerugian Penurunan Nilai",
+]
+
+SEABANK_RASIO_1_ROW = [
+    "KewajibanPenyediaanModal",
+    "Asetproduktifbermasalah",
+    "BebanOperasionalterhadap",
+    "PosisiDevisaNeto(PDN)secara",
+]
+SEABANK_RASIO_2_ROW = ["CadanganKerugianPenurunan"]
+SEABANK_RASIO_3_ROW = ["Asetproduktifbermasalahdan"]
+SEABANK_ASET_1_ROW = [
+    "Tagihan atas surat berharga yang dibeli dengan janji dijual kembali (reverse ",
+    "7. Tagihan atas surat berharga yang dibeli dengan janji dijual kembali (reverse",
+]
+
+ALLOBANK_RASIO_1_ROW = [
+    "Rasio",
+    "Aset produktif bermasalah dan aset non produktif bermasalah",
+    "Cadangan Kerugian Penurunan Nilai (CKPN) aset keuangan",
+]
+ALLOBANK_ASET_1_ROW = ["Tagihan atas surat berharga yang dibeli dengan janji dijual kembali"]
+
+BANK_JAGO_RASIO_1_ROW = [
+    "Aset produktif bermasalah dan aset non - produktif bermasalah  terhadap  total  aset  produktif  dan  aset",
+    "Aset produktif bermasalah terhadap total aset",
+    "Cadangan  Kerugian  Penurunan  Nilai (CKPN)  aset",
+]
+# Bank Jago changed its layout between quarters, hence the per-file variants
+BANK_JAGO_TEXT_LAYER = ["BankJagoq42024", "BankJagoq12024", "BankJagoq42023", "BankJagoq22023"]
+BANK_JAGO_LAYOUT_A = BANK_JAGO_TEXT_LAYER + ["BankJagoq12023"]
+
+BANKS = {
+    "BCADigital": {
+        "rasio": [
+            _variant("RASIO", 200, 5, steps=[
+                ("merge_rows", BCA_DIGITAL_RASIO_1_ROW, 1),
+                ("merge_rows", BCA_DIGITAL_RASIO_1_ROW, 1),
+                ("merge_2_rows", BCA_DIGITAL_RASIO_2_ROW, 1),
+            ]),
+        ],
+        "aset": [
+            _variant("ASET", 200, 8, steps=[("merge_rows", ["POS - POS"], 1)]),
+        ],
+        "liabilitas": [
+            _variant("LIABILITAS", 200, 5, steps=[("merge_rows", ["POS - POS"], 1)], cut=1, row_range=(0, 40)),
+        ],
+    },
+    "Seabank": {
+        "rasio": [
+            _variant("Rasio", 200, 8, steps=[
+                ("merge_rows", SEABANK_RASIO_1_ROW, 1),
+                ("merge_2_rows", SEABANK_RASIO_2_ROW, 1),
+                ("merge_3_rows", SEABANK_RASIO_3_ROW, 1),
+            ]),
+        ],
+        "aset": [
+            _variant("ASET", 200, 7, steps=[
+                ("merge_rows", SEABANK_ASET_1_ROW, 1),
+                ("merge_rows", SEABANK_ASET_1_ROW, 0),
+            ]),
+        ],
+        "liabilitas": [
+            _variant("LIABILITAS", 50, 7, files=["Seabankq42023", "Seabankq32023"]),
+            _variant("LIABILITAS", 200, 7),
+        ],
+    },
+    "Allobank": {
+        "rasio": [
+            _variant("Rasio", 200, 8, steps=[("merge_rows", ALLOBANK_RASIO_1_ROW, 1)]),
+        ],
+        "aset": [
+            _variant("ASET", 200, 8, steps=[
+                ("merge_rows", ALLOBANK_ASET_1_ROW, 1),
+                ("merge_rows", ALLOBANK_ASET_1_ROW, 0),
+            ]),
+        ],
+        "liabilitas": [
+            _variant("LIABILITAS", 200, 8),
+        ],
+    },
+    "BankJago": {
+        # The other quarters only have the ratio values as an image (OCR)
+        "rasio": [
+            _variant("Rasio Kinerja (Bank)", 50, 5, files=BANK_JAGO_TEXT_LAYER,
+                     steps=[("merge_rows", BANK_JAGO_RASIO_1_ROW, 1)]),
+            _ocr_variant("Rasio Kinerja (Bank)", "PERHITUNGAN RASIO KEUANGAN",
+                         "Posisi Devisa Neto (PDN) secara keseluruhan"),
+        ],
+        "aset": [
+            _variant("ASET", 50, 5, files=BANK_JAGO_LAYOUT_A,
+                     steps=[("merge_rows", ["Surat berharga yang dijual dengan janji dibeli"], 1)]),
+            _variant("ASET", 20, 5, files=["BankJagoq32023"],
+                     steps=[("merge_rows", ["Tagihan atas surat berharga yang dibeli dengan janji"], 1)]),
+            _variant("ASET", 20, 5, files=["BankJagoq22024", "BankJagoq32024"],
+                     steps=[("merge_rows", [
+                         "7.  Tagihan atas surat berharga yang dibeli dengan janji",
+                         "13. Cadangan kerugian penurunan nilai aset",
+                     ], 1)]),
+        ],
+        "liabilitas": [
+            _variant("LIABILITAS", 50, 5, files=BANK_JAGO_LAYOUT_A, cut=1, row_range=(0, 40)),
+            _variant("LIABILITAS", 20, 5, cut=1, row_range=(0, 40)),
+        ],
+    },
+}
+
+
+def statement_spec(bank: str, statement: str, stem: str):
+    """
+    The variant used for one PDF (by file stem), or None when the statement is not
+    extracted from that PDF
+    """
+    for variant in BANKS.get(bank, {}).get(statement, []):
+        if variant["files"] is None or stem in variant["files"]:
+            return variant
+    return None
@@ -0,0 +1,248 @@
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from .banks import BANKS, STATEMENTS, statement_spec
+from .extraction_cache import ExtractionCache, extraction_key
+from .locate import DEFAULT_CACHE_DIR, PageLocator, file_sha256
+from .merge import MERGE_FUNCTIONS
+from .ocr import DEFAULT_ENGINE, init_worker, ocr_statement
+from .tables import cut_dataframe_target, extract_pdf, search_page, write_table
+
+logger = logging.getLogger(__name__)
+
+# Quarterly report file names: <Bank>q<N><YYYY>.pdf, e.g. BCADigitalq12024.pdf
+PDF_NAME = re.compile(r"^(?P<bank>.+?)q(?P<quarter>[1-4])(?P<year>\d{4})\.pdf$")
+
+
+def discover_pdfs(root, banks=None) -> list:
+    """
+    Every quarterly report PDF under `root` (recursively), as dicts with
+    path, bank, quarter and year, sorted by (bank, year, quarter)
+    """
+    jobs = []
+    for path in Path(root).rglob("*.pdf"):
+        match = PDF_NAME.match(path.name)
+        if match is None:
+            continue
+        bank = match["bank"]
+        if banks and bank not in banks:
+            continue
+        jobs.append({
+            "path": str(path),
+            "bank": bank,
+            "quarter": int(match["quarter"]),
+            "year": int(match["year"]),
+        })
+    return sorted(jobs, key=lambda job: (job["bank"], job["year"], job["quarter"]))
+
+
+def read_tables(pdf_path: str, camelot_params: dict, pages: str = "all"):
+    """
+    Parse the given pages ("all" or e.g. "3,5") of the PDF with camelot's stream flavor
+    """
+    import camelot
+
+    return camelot.read_pdf(pdf_path, flavor="stream", pages=pages, **camelot_params)
+
+
+def apply_steps(df: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    """
+    Run the merge steps of a spec, then the optional cut below the header
+    """
+    for name, values, col_index in spec["steps"]:
+        df = MERGE_FUNCTIONS[name](df.copy(), values, col_index=col_index)
+    if spec["cut"] is not None:
+        df = cut_dataframe_target(df, spec["cut"], spec["target_value"])
+    return df
+
+
+def extract_statement(tables, spec: dict):
+    """
+    Pick the first table matching the spec header and clean it, None when no table matches
+    """
+    page_dfs = extract_pdf(tables)
+    found_dfs, found_keys, _ = search_page(page_dfs, spec["target_value"], spec["row_range"], spec["col_range"])
+    if not found_keys:
+        return None
+    return apply_steps(found_dfs[found_keys[0]], spec)
+
+
+def output_path(pdf_path: str, statement: str, output_dir=None, output_format: str = "parquet") -> str:
+    """
+    <statement>_merged_<pdf stem>.<parquet|xlsx>, next to the PDF unless `output_dir` is given
+    """
+    folder = output_dir or os.path.dirname(pdf_path)
+    return os.path.join(folder, f"{statement}_merged_{Path(pdf_path).stem}.{output_format}")
+
+
+def process_pdf(job: dict, statements=STATEMENTS, output_dir=None, locate: bool = True,
+                cache_dir: str = DEFAULT_CACHE_DIR, use_cache: bool = True, output_format: str = "parquet") -> dict:
+    """
+    Extract the requested statements of one PDF and write one file each
+    (Parquet, or Excel with output_format="xlsx").
+
+    With `use_cache`, each statement is first looked up in the content-addressed
+    extraction cache (PDF sha256, extractor version, spec); a hit whose output file
+    already exists costs one file hash and nothing else.
+
+    With `locate`, a text-layer pass (cached per file hash) finds the pages holding each
+    header first and camelot only parses those pages; when the header is not found there
+    the statement falls back to parsing every page. Parses with the same camelot
+    parameters and pages are shared between statements.
+    Statements with an OCR spec are not extracted here; they are returned under "ocr"
+    as (statement, spec, output path) for the OCR stage.
+    Returns {statement: output path, "skipped" or "not found"}, the statements served
+    from the cache, the pending OCR tasks and the elapsed time.
+    """
+    start = time.perf_counter()
+    pdf_path = job["path"]
+    stem = Path(pdf_path).stem
+    digest = file_sha256(pdf_path)
+    cache = ExtractionCache(cache_dir)
+    parsed = {}
+    results = {}
+    cached = []
+    ocr_tasks = []
+
+    specs = {statement: statement_spec(job["bank"], statement, stem) for statement in statements}
+    for statement, spec in list(specs.items()):
+        if spec is not None and "ocr" in spec:
+            ocr_tasks.append((statement, spec, output_path(pdf_path, statement + "_ocr", output_dir, output_format)))
+            results[statement] = "ocr"
+            del specs[statement]
+
+    # Cache lookups first, so a PDF whose statements are all cached is never parsed
+    extracted = {}
+    for statement, spec in specs.items():
+        if spec is not None and use_cache:
+            df_cached = cache.get(extraction_key(digest, spec))
+            if df_cached is not None:
+                extracted[statement] = df_cached
+                cached.append(statement)
+
+    targets = sorted({spec["target_value"] for statement, spec in specs.items()
+                      if spec is not None and statement not in extracted})
+    located = {}
+    if locate and targets:
+        try:
+            located = PageLocator(cache_dir).locate(pdf_path, targets, digest)
+        except Exception as e:
+            # e.g. a broken text layer pdfminer cannot read: camelot may still parse the PDF
+            logger.warning("Could not locate the statement pages of %s, parsing all pages: %s", pdf_path, e)
+
+    def tables_for(spec, pages):
+        key = (tuple(sorted(spec["camelot"].items())), pages)
+        if key not in parsed:
+            parsed[key] = read_tables(pdf_path, spec["camelot"], pages)
+        return parsed[key]
+
+    for statement, spec in specs.items():
+        if spec is None:
+            results[statement] = "skipped"
+            continue
+
+        result_path = output_path(pdf_path, statement, output_dir, output_format)
+        if statement in extracted:
+            if not os.path.exists(result_path):
+                write_table(extracted[statement], result_path)
+            results[statement] = result_path
+            continue
+
+        pages = located.get(spec["target_value"])
+        df_result = None
+        if pages:
+            df_result = extract_statement(tables_for(spec, ",".join(map(str, pages))), spec)
+            if df_result is None:
+                logger.info("%s: '%s' not found on located pages %s of %s, parsing all pages",
+                            statement, spec["target_value"], pages, pdf_path)
+        if df_result is None:
+            df_result = extract_statement(tables_for(spec, "all"), spec)
+
+        if df_result is None:
+            logger.warning("%s: '%s' table not found in %s", statement, spec["target_value"], pdf_path)
+            results[statement] = "not found"
+            continue
+
+        if use_cache:
+            cache.put(extraction_key(digest, spec), df_result)
+        write_table(df_result, result_path)
+        results[statement] = result_path
+
+    return {"path": pdf_path, "results": results, "cached": cached, "ocr": ocr_tasks,
+            "seconds": time.perf_counter() - start}
+
+
+def run_batch(root, workers: int = None, statements=STATEMENTS, banks=None, output_dir=None,
+              locate: bool = True, cache_dir: str = DEFAULT_CACHE_DIR, use_cache: bool = True,
+              ocr_workers: int = 1, ocr_engine: str = DEFAULT_ENGINE, output_format: str = "parquet") -> list:
+    """
+    Extract every PDF under `root` in a process pool, one PDF per task.
+
+    Image-based statements go to a second pool of `ocr_workers` processes, each loading
+    the OCR model once; they are submitted as soon as their PDF is done, so OCR runs
+    alongside the camelot extraction of the other PDFs.
+
+    `workers` defaults to the number of CPUs; workers=1 runs everything in-process
+    (easier to debug). A PDF that fails is reported with its error and does not stop the batch.
+    """
+    jobs = [job for job in discover_pdfs(root, banks) if job["bank"] in BANKS]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    reports = []
+    if workers == 1:
+        for job in jobs:
+            report = _run_job(job, statements, output_dir, locate, cache_dir, use_cache, output_format)
+            for statement, spec, result_path in report.get("ocr", []):
+                _store_ocr(report, statement, _run_ocr(report["path"], spec, result_path, cache_dir, ocr_engine))
+            reports.append(report)
+        return reports
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            ProcessPoolExecutor(max_workers=ocr_workers, initializer=init_worker, initargs=(ocr_engine,)) as ocr_executor:
+        futures = [executor.submit(_run_job, job, statements, output_dir, locate, cache_dir, use_cache, output_format) for job in jobs]
+        ocr_futures = {}
+        for future in as_completed(futures):
+            report = future.result()
+            logger.info("%s done in %.1f s", report["path"], report["seconds"])
+            reports.append(report)
+            for statement, spec, result_path in report.get("ocr", []):
+                ocr_future = ocr_executor.submit(_run_ocr, report["path"], spec, result_path, cache_dir, ocr_engine)
+                ocr_futures[ocr_future] = (report, statement)
+
+        for ocr_future in as_completed(ocr_futures):
+            report, statement = ocr_futures[ocr_future]
+            _store_ocr(report, statement, ocr_future.result())
+
+    return sorted(reports, key=lambda report: report["path"])
+
+
+def _run_job(job: dict, statements, output_dir, locate, cache_dir, use_cache, output_format) -> dict:
+    try:
+        return process_pdf(job, statements, output_dir, locate, cache_dir, use_cache, output_format)
+    except Exception as e:
+        return {"path": job["path"], "results": {}, "error": repr(e), "seconds": 0.0}
+
+
+def _run_ocr(pdf_path: str, spec: dict, result_path: str, cache_dir: str, engine_name: str) -> dict:
+    try:
+        return ocr_statement(pdf_path, spec, result_path, cache_dir, engine_name)
+    except Exception as e:
+        return {"path": pdf_path, "result": "failed", "error": repr(e)}
+
+
+def _store_ocr(report: dict, statement: str, ocr_report: dict) -> None:
+    """
+    Put the outcome of an OCR task into the report of its PDF
+    """
+    report["results"][statement] = ocr_report["result"]
+    if ocr_report.get("cached"):
+        report["cached"].append(statement)
+    if "error" in ocr_report:
+        logger.warning("OCR of %s (%s) failed: %s", report["path"], statement, ocr_report["error"])
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+from .locate import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to the parsing / merging code changes the extracted tables,
+# every cached result of the previous version is then ignored
+EXTRACTOR_VERSION = "2"
+
+
+def extraction_key(pdf_sha256: str, spec: dict) -> str:
+    """
+    Content address of one extracted statement: the PDF bytes, the extractor version
+    and everything in the spec that shapes the table (header, search window,
+    camelot parameters, merge steps, cut)
+    """
+    payload = {
+        "pdf": pdf_sha256,
+        "version": EXTRACTOR_VERSION,
+        "target_value": spec["target_value"],
+        "row_range": list(spec["row_range"]),
+        "col_range": list(spec["col_range"]),
+        "camelot": spec["camelot"],
+        "steps": [[name, list(values), col_index] for name, values, col_index in spec["steps"]],
+        "cut": spec["cut"],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Extracted statement tables stored as Parquet under <cache_dir>/tables/<key>.parquet.
+
+    The tables are all-text grids with integer column labels; Parquet needs string
+    column names, so they are stringified on write and restored on read. Without
+    pyarrow the cache is disabled and every statement is extracted again.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = os.path.join(cache_dir, "tables")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key: str):
+        """
+        The cached table, or None on a miss (or an unreadable entry)
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except (OSError, ValueError, ImportError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            return None
+        df.columns = [int(col) for col in df.columns]
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        stored = df.reset_index(drop=True)
+        stored.columns = [str(col) for col in stored.columns]
+        try:
+            stored.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, ImportError) as e:
+            logger.warning("Could not cache %s: %s", path, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
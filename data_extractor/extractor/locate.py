@@ -0,0 +1,107 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Default cache folder: data_extractor/.cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    sha256 of a file's content, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_texts(pdf_path: str) -> list:
+    """
+    Raw text layer of every page with all whitespace removed.
+
+    pdfminer runs without layout analysis (laparams=None), so this is a few times
+    cheaper than one camelot stream parse of the whole document.
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    manager = PDFResourceManager()
+    texts = []
+    with open(pdf_path, "rb") as f:
+        for page in PDFPage.get_pages(f):
+            buffer = io.StringIO()
+            device = TextConverter(manager, buffer, laparams=None)
+            PDFPageInterpreter(manager, device).process_page(page)
+            device.close()
+            texts.append(_WHITESPACE.sub("", buffer.getvalue()))
+    return texts
+
+
+def find_pages(texts: list, target_value: str) -> list:
+    """
+    1-based numbers of the pages whose text contains `target_value`
+    (case-sensitive like search_page, whitespace ignored)
+    """
+    needle = _WHITESPACE.sub("", target_value)
+    return [i for i, text in enumerate(texts, start=1) if needle in text]
+
+
+class PageLocator:
+    """
+    Finds the pages holding each table header from the text layer, cached per file hash.
+
+    The cache is one small JSON file per PDF content (<cache_dir>/pages/<sha256>.json,
+    {target: [pages]}), so parallel workers never write the same file and a renamed or
+    re-downloaded PDF with the same bytes reuses its entry.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = os.path.join(cache_dir, "pages")
+
+    def _cache_file(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load(self, digest: str) -> dict:
+        try:
+            with open(self._cache_file(digest), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, digest: str, located: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_file(digest)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(located, f, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def locate(self, pdf_path: str, targets, digest: str = None) -> dict:
+        """
+        {target: [page numbers]} for every target, reading the text layer only when
+        one of them is not cached yet for this file content (`digest`, hashed if not given)
+        """
+        digest = digest or file_sha256(pdf_path)
+        located = self._load(digest)
+        missing = [target for target in targets if target not in located]
+
+        if missing:
+            texts = page_texts(pdf_path)
+            for target in missing:
+                located[target] = find_pages(texts, target)
+            try:
+                self._save(digest, located)
+            except OSError as e:
+                logger.warning("Could not write the page cache for %s: %s", pdf_path, e)
+
+        return {target: located[target] for target in targets}
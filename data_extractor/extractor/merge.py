@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+
+def normalize_text(text) -> str:
+    """Convert text to lowercase and remove all spaces."""
+    return str(text).lower().replace(" ", "")
+
+
+def normalize_column(values) -> np.ndarray:
+    """normalize_text for a whole column at once."""
+    text = np.asarray(values).astype(str)
+    return np.char.replace(np.char.lower(text), " ", "")
+
+
+def merge_next_rows(df: pd.DataFrame, merge_counts: dict, col_index: int = 1, strip: bool = True) -> pd.DataFrame:
+    """
+    Merge every row whose `col_index` value is a key of `merge_counts` with the K rows
+    below it (K = merge_counts[label]) and remove those K rows. Labels are compared
+    normalized (lowercase, no spaces).
+
+    Rows are scanned top-down: a row already merged into the row above it cannot start
+    a merge itself, and a row needs K rows below it to be merged.
+    The cells of a merged row are joined with a space; with `strip`, every cell is stripped
+    first and empty cells are left out, otherwise cells are joined as they are.
+    """
+    n_rows = len(df)
+    counts = {normalize_text(label): k for label, k in merge_counts.items()}
+    if n_rows == 0 or not counts:
+        return df.reset_index(drop=True)
+
+    # K for every row from the normalized key column, normalized once
+    labels = np.array(list(counts), dtype=str)
+    spans_by_label = np.array(list(counts.values()), dtype=np.int64)
+    key = normalize_column(df.iloc[:, col_index].to_numpy())
+    hit = key[:, None] == labels[None, :]
+    k_per_row = np.where(hit.any(axis=1), spans_by_label[hit.argmax(axis=1)], 0)
+    k_per_row[np.arange(n_rows) + k_per_row >= n_rows] = 0
+
+    # Walk only the candidate rows to drop the ones swallowed by an earlier merge
+    starts, spans = [], []
+    covered_until = -1
+    for i in np.flatnonzero(k_per_row):
+        if i <= covered_until:
+            continue
+        starts.append(i)
+        spans.append(k_per_row[i])
+        covered_until = i + k_per_row[i]
+    if not starts:
+        return df.reset_index(drop=True)
+    starts = np.asarray(starts)
+    spans = np.asarray(spans)
+
+    # Group id per row: a row opens a new group unless it is merged into the row above
+    member = np.zeros(n_rows + 1, dtype=np.int64)
+    np.add.at(member, starts + 1, 1)
+    np.add.at(member, starts + spans + 1, -1)
+    merged_away = np.cumsum(member)[:n_rows] > 0
+
+    # Rows taking part in a merge, as text
+    in_merge = merged_away.copy()
+    in_merge[starts] = True
+    values = df.to_numpy(dtype=object)
+    cells = values[in_merge].astype(str)
+    if strip:
+        cells = np.char.strip(cells)
+
+    # Group-aggregate with one string reduction per column: every part but the first of
+    # its group gets the separator (with `strip`, every non-empty part does and the
+    # leading separator is removed afterwards, so empty cells add nothing)
+    group_first = ~merged_away[in_merge]
+    parts = cells.astype(object)
+    if strip:
+        parts = np.where(cells != "", " " + parts, "")
+    else:
+        parts = np.where(group_first[:, None], parts, " " + parts)
+    joined = np.add.reduceat(parts, np.flatnonzero(group_first), axis=0)
+    if strip:
+        joined = np.vectorize(lambda text: text[1:], otypes=[object])(joined)
+
+    values[starts] = joined
+    return pd.DataFrame(values[~merged_away], columns=df.columns)
+
+
+def merge_rows(df: pd.DataFrame, merge_list: list, col_index: int = 1) -> pd.DataFrame:
+    """
+    Merge rows where the value in `col_index` is in `merge_list` with the next row,
+    and then remove that row
+    """
+    return merge_next_rows(df, {label: 1 for label in merge_list}, col_index, strip=False)
+
+
+def merge_2_rows(df: pd.DataFrame, two_row_list: list, col_index: int = 1) -> pd.DataFrame:
+    """
+    Merge rows where the value in `col_index` is in `two_row_list`
+    with the next 2 rows, and then remove those 2 rows.
+    """
+    return merge_next_rows(df, {label: 2 for label in two_row_list}, col_index)
+
+
+def merge_3_rows(df: pd.DataFrame, three_row_list: list, col_index: int = 1) -> pd.DataFrame:
+    """
+    Merge rows where the value in `col_index` is in `three_row_list`
+    with the next 3 rows, and then remove those 3 rows.
+    """
+    return merge_next_rows(df, {label: 3 for label in three_row_list}, col_index)
+
+
+# Merge step name -> function, used by the bank specs
+MERGE_FUNCTIONS = {
+    "merge_rows": merge_rows,
+    "merge_2_rows": merge_2_rows,
+    "merge_3_rows": merge_3_rows,
+}
@@ -0,0 +1,241 @@
+"""
+OCR stage for statements whose numbers are only available as an image in the PDF.
+
+The page holding the table is found from the text layer (the labels are usually still
+text even when the numbers are not), only the table region of that page is rasterized
+at the requested DPI, and the image is read by an OCR engine that every pool worker
+builds once. Results are cached by the hash of the rendered image, so a re-run only
+OCRs images that changed.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+
+import pandas as pd
+
+from .locate import DEFAULT_CACHE_DIR, _WHITESPACE
+from .tables import write_table
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DPI = 200
+DEFAULT_ENGINE = "paddle"
+
+# Horizontal gap (points) separating two panels of a multi-column page
+PANEL_GAP = 8
+REGION_PADDING = 4
+
+# OCR engine of this process, built once by init_worker
+_ENGINE = None
+
+
+def build_engine(name: str = DEFAULT_ENGINE):
+    """
+    Create the OCR engine: "paddle" (PaddleOCR, as in the notebook) or "tesseract"
+    """
+    if name == "paddle":
+        from paddleocr import PaddleOCR
+
+        return ("paddle", PaddleOCR(lang="en"))
+    if name == "tesseract":
+        import pytesseract
+
+        return ("tesseract", pytesseract)
+    raise ValueError(f"Unknown OCR engine {name!r}, expected 'paddle' or 'tesseract'")
+
+
+def init_worker(engine_name: str = DEFAULT_ENGINE) -> None:
+    """
+    Pool initializer: load the OCR model once per worker process. A failure is only
+    logged here (an initializer error would break the whole pool); the tasks then
+    retry and report it one by one.
+    """
+    global _ENGINE
+    try:
+        _ENGINE = build_engine(engine_name)
+    except Exception as e:
+        logger.warning("Could not load the %s OCR engine: %s", engine_name, e)
+
+
+def recognize(image_png: bytes, engine=None) -> list:
+    """
+    All text snippets the engine reads on a PNG image, in reading order
+    """
+    kind, model = engine or _ENGINE
+    if kind == "paddle":
+        import numpy as np
+        from PIL import Image
+
+        image = np.asarray(Image.open(io.BytesIO(image_png)).convert("RGB"))
+        texts = []
+        for result in model.predict(image):
+            texts.extend(result.get("rec_texts", []))
+        return texts
+
+    from PIL import Image
+
+    text = model.image_to_string(Image.open(io.BytesIO(image_png)))
+    return text.split()
+
+
+def percent_texts_frame(texts: list) -> pd.DataFrame:
+    """
+    Keep the snippets containing both a digit and '%' and arrange them into a
+    2-column DataFrame (even index -> Column 1, odd index -> Column 2)
+    """
+    filtered_texts = [text for text in texts if re.search(r'\d', text) and '%' in text]
+
+    col1 = filtered_texts[0::2]
+    col2 = filtered_texts[1::2]
+
+    # Pad columns if their lengths differ
+    max_len = max(len(col1), len(col2))
+    col1 += [''] * (max_len - len(col1))
+    col2 += [''] * (max_len - len(col2))
+
+    return pd.DataFrame({'Column 1': col1, 'Column 2': col2})
+
+
+def _text_lines(layout):
+    from pdfminer.layout import LTTextLine
+
+    if isinstance(layout, LTTextLine):
+        yield layout
+    elif hasattr(layout, "__iter__"):
+        for child in layout:
+            yield from _text_lines(child)
+
+
+def table_region(pdf_path: str, start_text: str, end_text: str) -> tuple:
+    """
+    Locate a table on the text layer: the page holding `start_text` (the panel title)
+    and the bounding box (x0, y0, x1, y1, in points) from that title down to the
+    `end_text` line, limited horizontally to the panel the title sits in.
+    Returns (page number, bbox), or (None, None) when the title is not found.
+    """
+    from pdfminer.high_level import extract_pages
+
+    start_key = _WHITESPACE.sub("", start_text)
+    end_key = _WHITESPACE.sub("", end_text)
+
+    for page_number, page in enumerate(extract_pages(pdf_path), start=1):
+        lines = list(_text_lines(page))
+        keys = [_WHITESPACE.sub("", line.get_text()) for line in lines]
+        starts = [line for line, key in zip(lines, keys) if start_key in key]
+        if not starts:
+            continue
+        title = starts[0]
+        title_center = (title.x0 + title.x1) / 2
+
+        # Closest end line below the title, in the same panel
+        ends = [line for line, key in zip(lines, keys)
+                if end_key in key and line.y1 <= title.y0 and line.x0 <= title_center]
+        bottom = max(ends, key=lambda line: line.y1).y0 if ends else page.y0
+        band = [line for line in lines if line.y0 >= bottom and line.y1 <= title.y1]
+
+        # Merge the horizontal extents of the band into panels and keep the title's one
+        panels = []
+        for line in sorted(band, key=lambda line: line.x0):
+            if panels and line.x0 <= panels[-1][1] + PANEL_GAP:
+                panels[-1][1] = max(panels[-1][1], line.x1)
+            else:
+                panels.append([line.x0, line.x1])
+        x0, x1 = next(panel for panel in panels if panel[0] <= title_center <= panel[1])
+
+        bbox = (
+            max(x0 - REGION_PADDING, page.x0),
+            max(bottom - REGION_PADDING, page.y0),
+            min(x1 + REGION_PADDING, page.x1),
+            min(title.y1 + REGION_PADDING, page.y1),
+        )
+        return page_number, bbox
+    return None, None
+
+
+def render_region(pdf_path: str, page_number: int, bbox=None, dpi: int = DEFAULT_DPI) -> bytes:
+    """
+    Rasterize one page (only `bbox`, in points, when given) to PNG bytes
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_number - 1]
+        crop = (0, 0, 0, 0)
+        if bbox is not None:
+            width, height = page.get_size()
+            x0, y0, x1, y1 = bbox
+            crop = (x0, y0, width - x1, height - y1)
+        image = page.render(scale=dpi / 72, crop=crop).to_pil()
+    finally:
+        pdf.close()
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class OcrCache:
+    """
+    OCR results by (image sha256, engine) under <cache_dir>/ocr/<key>.parquet
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = os.path.join(cache_dir, "ocr")
+
+    def key(self, image_png: bytes, engine_name: str) -> str:
+        return hashlib.sha256(image_png + engine_name.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        path = os.path.join(self.cache_dir, f"{key}.parquet")
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except (OSError, ValueError, ImportError) as e:
+            logger.warning("Ignoring unreadable OCR cache entry %s: %s", path, e)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.parquet")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, ImportError) as e:
+            logger.warning("Could not cache %s: %s", path, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def ocr_statement(pdf_path: str, spec: dict, result_path: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                  engine_name: str = DEFAULT_ENGINE) -> dict:
+    """
+    Run the OCR spec of one statement (spec["ocr"]: start / end text, dpi) and write its
+    table to `result_path` (Parquet or Excel, by suffix). Meant to run in an OCR pool
+    worker (init_worker), the engine is only built here when the process has none yet.
+    """
+    global _ENGINE
+    ocr_spec = spec["ocr"]
+
+    page_number, bbox = table_region(pdf_path, ocr_spec["start"], ocr_spec["end"])
+    if page_number is None:
+        return {"path": pdf_path, "result": "not found"}
+
+    image_png = render_region(pdf_path, page_number, bbox, ocr_spec.get("dpi", DEFAULT_DPI))
+    cache = OcrCache(cache_dir)
+    key = cache.key(image_png, engine_name)
+    df_result = cache.get(key)
+    cached = df_result is not None
+
+    if df_result is None:
+        if _ENGINE is None or _ENGINE[0] != engine_name:
+            _ENGINE = build_engine(engine_name)
+        df_result = percent_texts_frame(recognize(image_png))
+        cache.put(key, df_result)
+
+    write_table(df_result, result_path)
+    return {"path": pdf_path, "result": result_path, "cached": cached}
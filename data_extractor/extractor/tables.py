@@ -0,0 +1,102 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# File formats of the extracted tables: Parquet by default, Excel still available
+OUTPUT_FORMATS = ("parquet", "xlsx")
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Write an extracted table (a header-less text grid) in the format given by the
+    file suffix: Parquet (column labels stored as strings) or Excel
+    """
+    if str(path).endswith(".parquet"):
+        stored = df.reset_index(drop=True)
+        stored.columns = [str(col) for col in stored.columns]
+        stored.to_parquet(path, index=False)
+    else:
+        df.to_excel(path, index=False, header=False)
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """
+    Read back a table written by write_table, with the same integer column labels
+    """
+    if str(path).endswith(".parquet"):
+        df = pd.read_parquet(path)
+        df.columns = [int(col) for col in df.columns]
+        return df
+    return pd.read_excel(path, header=None, dtype=str)
+
+
+def extract_pdf(tables) -> dict:
+    """
+    Group camelot tables by page: {page_number: [DataFrame, ...]}
+    """
+    # Dictionary to store DataFrames for each page
+    page_dfs = {}
+
+    # Group tables by page
+    for table in tables:
+        page_number = table.page  # which page the table came from
+        if page_number not in page_dfs:
+            page_dfs[page_number] = []
+
+        # Convert the table to a DataFrame and append
+        page_dfs[page_number].append(table.df)
+
+    return page_dfs
+
+
+def search_page(page_dfs: dict, target_value: str, row_range: tuple, col_range: tuple) -> tuple:
+    """
+    Find the tables that contain `target_value` exactly inside rows `row_range`
+    and columns `col_range` (both inclusive).
+
+    Returns (found_dfs, found_keys, found_page_num), the keys look like
+    "<target>_page<N>_table<i>".
+    """
+    # df to store the found DataFrames with custom names
+    found_dfs = {}
+    found_keys = []
+    found_page_num = []
+
+    start_row, end_row = row_range
+    start_col, end_col = col_range
+
+    # Loop through all pages and tables
+    for page_num, dfs in page_dfs.items():
+        for i, df in enumerate(dfs, start=1):
+            sub_df_cols = df.iloc[start_row:end_row + 1, start_col:end_col + 1]
+
+            # Check if target_value exists exactly in any cell
+            if (sub_df_cols == target_value).any().any():
+                custom_name = f"{target_value}_page{page_num}_table{i}"
+                found_keys.append(custom_name)
+                found_page_num.append(page_num)
+                found_dfs[custom_name] = df.copy()
+                logger.debug("Found exact match '%s' in Page %s, Table %s", target_value, page_num, i)
+
+    return found_dfs, found_keys, found_page_num
+
+
+def cut_dataframe_target(df: pd.DataFrame, col_index: int, target: str) -> pd.DataFrame:
+    """
+    Keep the rows from 3 rows above the first `target` in column `col_index`
+    (case and spaces ignored) down to the end
+    """
+    standardized_target = target.lower().replace(' ', '')
+
+    # Standardize column values
+    standardized_col = df[col_index].str.lower().str.replace(' ', '', regex=False)
+
+    # Find first match
+    start_index = df[standardized_col == standardized_target].index.min()
+
+    # Filter rows from that index down
+    if start_index >= 3:
+        return df.loc[start_index - 3:]
+    return df.loc[0:]
@@ -0,0 +1,193 @@
+"""
+Search for camelot stream parameters that extract a given table.
+
+Candidates of the edge_tol x row_tol x split_text x strip_text grid are evaluated in a
+process pool and the search stops at the first candidate (in grid order) whose tables
+contain the target header. The winning parameters are remembered per bank and header
+in a JSON params store, so the next quarter of the same bank tries them first and
+usually skips the grid.
+
+    python -m data_extractor.extractor.tune "data_extractor/Seabank/Seabankq12025.pdf" --target Rasio --bank Seabank
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import product
+
+from .banks import COL_RANGE, ROW_RANGE
+from .batch import read_tables
+from .locate import DEFAULT_CACHE_DIR, PageLocator
+from .tables import extract_pdf, search_page
+
+logger = logging.getLogger(__name__)
+
+EDGE_TOL_VALUES = [50, 100, 150, 200, 300]
+ROW_TOL_VALUES = [1, 2, 3, 4, 5]
+SPLIT_TEXT_VALUES = [True, False]
+STRIP_TEXT_VALUES = ['\n', '']
+
+
+def param_grid() -> list:
+    """
+    Every candidate of the tuning grid, in the order the notebook tried them
+    """
+    return [
+        {"edge_tol": edge_tol, "row_tol": row_tol, "split_text": split_text, "strip_text": strip_text}
+        for edge_tol, row_tol, split_text, strip_text in product(
+            EDGE_TOL_VALUES, ROW_TOL_VALUES, SPLIT_TEXT_VALUES, STRIP_TEXT_VALUES
+        )
+    ]
+
+
+class ParamsStore:
+    """
+    Known-good camelot parameters per (bank, target header), kept in one JSON file
+    """
+
+    def __init__(self, path: str = os.path.join(DEFAULT_CACHE_DIR, "camelot_params.json")):
+        self.path = path
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, bank: str, target_value: str):
+        return self._load().get(bank, {}).get(target_value)
+
+    def put(self, bank: str, target_value: str, params: dict) -> None:
+        data = self._load()
+        data.setdefault(bank, {})[target_value] = params
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def evaluate_params(pdf_path: str, target_value: str, params: dict, pages: str = "all",
+                    row_range: tuple = ROW_RANGE, col_range: tuple = COL_RANGE):
+    """
+    The first table matching `target_value` with these parameters, None when there is
+    no match or camelot fails on them
+    """
+    try:
+        tables = read_tables(pdf_path, params, pages)
+        found_dfs, found_keys, _ = search_page(extract_pdf(tables), target_value, row_range, col_range)
+    except Exception as e:
+        logger.debug("Error with %s: %s", params, e)
+        return None
+    return found_dfs[found_keys[0]] if found_keys else None
+
+
+def _search_grid(pdf_path, target_value, candidates, pages, row_range, col_range, workers) -> tuple:
+    """
+    First candidate (in grid order) that matches, evaluated in parallel: once candidate i
+    matches, every pending candidate after i is cancelled and only the ones before i
+    that are already running are waited for
+    """
+    if workers == 1:
+        for params in candidates:
+            df = evaluate_params(pdf_path, target_value, params, pages, row_range, col_range)
+            if df is not None:
+                return params, df
+        return None, None
+
+    best_index, best_df = None, None
+    # Not a `with` block: its exit would shutdown(wait=True) and wait for the later
+    # candidates that are already running. They finish in the background instead.
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {
+            executor.submit(evaluate_params, pdf_path, target_value, params, pages, row_range, col_range): i
+            for i, params in enumerate(candidates)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                df = future.result()
+                if df is not None and (best_index is None or i < best_index):
+                    best_index, best_df = i, df
+
+            if best_index is not None:
+                # Later candidates can no longer win
+                for future, i in list(pending.items()):
+                    if i > best_index and future.cancel():
+                        del pending[future]
+                if all(i > best_index for i in pending.values()):
+                    break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if best_index is None:
+        return None, None
+    return candidates[best_index], best_df
+
+
+def tune_camelot_params(pdf_path: str, target_value: str, bank: str = None, pages: str = None,
+                        workers: int = None, store: ParamsStore = None,
+                        row_range: tuple = ROW_RANGE, col_range: tuple = COL_RANGE,
+                        cache_dir: str = DEFAULT_CACHE_DIR) -> tuple:
+    """
+    Find camelot parameters that extract the `target_value` table of a PDF.
+
+    The parameters stored for `bank` are tried first; otherwise the grid is searched
+    in parallel with early exit, and the winner is stored for the bank.
+    `pages` defaults to the pages located from the text layer (every page if none).
+
+    Returns (params, table DataFrame), or (None, None) when no candidate matches.
+    """
+    store = store or ParamsStore(os.path.join(cache_dir, "camelot_params.json"))
+
+    if pages is None:
+        located = PageLocator(cache_dir).locate(pdf_path, [target_value])[target_value]
+        pages = ",".join(map(str, located)) if located else "all"
+
+    known = store.get(bank, target_value) if bank else None
+    if known is not None:
+        df = evaluate_params(pdf_path, target_value, known, pages, row_range, col_range)
+        if df is not None:
+            logger.info("Stored parameters still match for %s: %s", bank, known)
+            return known, df
+        logger.info("Stored parameters for %s no longer match, searching the grid", bank)
+
+    candidates = [params for params in param_grid() if params != known]
+    params, df = _search_grid(pdf_path, target_value, candidates, pages, row_range, col_range, workers)
+
+    if params is None:
+        logger.warning("No matching table found for '%s' in %s", target_value, pdf_path)
+    elif bank:
+        store.put(bank, target_value, params)
+    return params, df
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m data_extractor.extractor.tune",
+                                     description="Find camelot parameters that extract a table from a PDF.")
+    parser.add_argument("pdf")
+    parser.add_argument("--target", required=True, help="exact header text of the table, e.g. RASIO")
+    parser.add_argument("--bank", help="bank key under which the winning parameters are stored")
+    parser.add_argument("--pages", default=None, help='camelot pages, e.g. "3,5" (default: located pages)')
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    logging.getLogger("camelot").setLevel(logging.WARNING)
+
+    params, df = tune_camelot_params(args.pdf, args.target, bank=args.bank, pages=args.pages,
+                                     workers=args.workers, cache_dir=args.cache_dir)
+    if params is None:
+        return 1
+    print(params)
+    print(df.head(15).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
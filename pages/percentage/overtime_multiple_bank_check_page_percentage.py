@@ -5,12 +5,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import sys
 from pathlib import Path
-import operator
 
 # add "../data" to sys.path
 sys.path.append(str(Path(__file__).resolve().parents[2] / "data"))
 
-from import_data import import_rasio, import_fitur_rasio, import_dictionary_rasio
+from import_data import import_fitur_rasio, import_dictionary_rasio
+from data_store import get_rasio_store
+from time_axis import period_labels
+from stats import summary_stats
+from figure_cache import canonical_key, get_figure_cache
+from screening import screen
 
 st.markdown("# Overtime Multiple Bank Persentase")
 
@@ -41,35 +45,29 @@ with st.sidebar:
         """
     )
 
+figure_cache = get_figure_cache()
+
 px.defaults.color_continuous_scale = "Viridis"
 px.defaults.template = "plotly_white"  # or "ggplot2", "seaborn", etc.
 
-# Convert year_quarter to a sortable key (e.g., 2024_q1 -> (2024, 1))
-def quarter_sort_key(yq):
-    year, q = yq.split('_q')
-    return int(year) * 4 + int(q)
-
 # File path for data
 # rasio_file_path = "data/summarized_rasio.xlsx"
 # df_rasio = pd.read_excel(rasio_file_path)
-df_rasio = import_rasio()
-# Placeholder for combined df
-df = df_rasio.copy()
+# Shared, read-only frame (already parsed and sorted by company and quarter), never modify it in place
+store = get_rasio_store()
+df = store.frame
 
 # Sort company names in ascending order
-sorted_companies = sorted(df['company_name'].unique())
+sorted_companies = store.companies
 
 # Sort year in ascending order
-sorted_year = sorted(df['year'].unique())
+sorted_year = store.filters.values('year')
 
 # Sort quartile in ascending order
-sorted_quartile = sorted(df['quarter'].unique())
+sorted_quartile = store.filters.values('quarter')
 
 # Sort kbmi type in ascending order
-sorted_kbmi = sorted(df['kbmi_type'].unique())
-
-# Set the category order explicitly
-df['company_name'] = pd.Categorical(df['company_name'], categories=sorted_companies, ordered=True)
+sorted_kbmi = store.kbmi_types
 
 # Placeholder for list of company name
 list_companies_to_check = sorted_companies
@@ -84,10 +82,6 @@ item_dict_list = [dict_rasio[item] for item in list_columns_to_check]
 # Map back from display value -> original key
 reverse_map = {dict_rasio[item]: item for item in list_columns_to_check}
 
-# Ensure quarter sorting is applied
-df['sort_key'] = df['year_quarter'].apply(quarter_sort_key)
-df = df.sort_values(by='sort_key')
-
 # Default values
 default_feature = "ROA" if "ROA" in list_columns_to_check else list_columns_to_check[0]
 default_display = dict_rasio[default_feature]
@@ -96,7 +90,97 @@ default_year = sorted_year
 default_quartile = sorted_quartile
 default_kbmi = sorted_kbmi
 
-# Helper function to render one chart block
+# Build one chart block (figure, formatted stats table and the filtered row positions), cached by its inputs
+def build_multi_company_chart(index: int, column_to_check: str, selected_display: str, selected_kbmi: list,
+                              selected_companies: list, selected_year: list, selected_quartile: list, date_range):
+    # Rows matching the selections: bitmaps intersected by the filter index
+    rows = store.filters.rows(
+        kbmi_type=selected_kbmi,
+        company_name=selected_companies,
+        year=selected_year,
+        quarter=selected_quartile,
+    )
+
+    # Date range, binary search on the sorted posisi index (datetime64, no Python dates)
+    if date_range is not None:
+        rows = rows[store.dates.mask(*date_range)[rows]]
+
+    # Filtered data based on company and date range, only the selected rows and the
+    # charted feature are copied (the feature is read from the dataset on first use)
+    df_filtered = store.take(rows, columns=[column_to_check])
+
+    # Plot
+    fig = px.line(
+        df_filtered,
+        x='year_quarter',
+        y=column_to_check,
+        color='company_name',
+        markers=True,
+        title=f"{selected_display} Over Time (Chart {index+1})"
+    )
+
+    # Compute summary stats from filtered data (one sort for every percentile)
+    values_stats = summary_stats(df_filtered[column_to_check])
+
+    stats = {
+        "Min": values_stats["min"],
+        "P5": values_stats[5],
+        "P10": values_stats[10],
+        "P15": values_stats[15],
+        "Q1 (25%)": values_stats[25],
+        "Mean": values_stats["mean"],
+        "Median": values_stats[50],
+        "Q3 (75%)": values_stats[75],
+        "P85": values_stats[85],
+        "P90": values_stats[90],
+        "P95": values_stats[95],
+        "Max": values_stats["max"],
+        "Std": values_stats["std"]
+    }
+
+    # Add horizontal lines for key stats
+    highlight_stats = {
+        "Mean": ("white", stats["Mean"]),
+        "Median": ("firebrick", stats["Median"]),
+        "Q1 (25%)": ("royalblue", stats["Q1 (25%)"]),
+        "Q3 (75%)": ("green", stats["Q3 (75%)"]),
+    }
+
+    for label, (color, y_val) in highlight_stats.items():
+        fig.add_trace(
+            go.Scatter(
+                x=[df_filtered['year_quarter'].min(), df_filtered['year_quarter'].max()],
+                y=[y_val, y_val],
+                mode="lines",
+                line=dict(color=color, dash="dash"),
+                name=label,
+                hovertemplate=f"{label}: {y_val:.2%}<extra></extra>",
+                showlegend=True
+            )
+        )
+
+    # Lock x-axis order
+    fig.update_layout(
+        xaxis_title="Year Quarter",
+        yaxis_title=selected_display,
+        xaxis=dict(categoryorder='array', categoryarray=period_labels(np.unique(df_filtered['sort_key']))),
+        yaxis=dict(tickformat=".2%"),
+        legend_traceorder="normal",
+        template="plotly_white"
+    )
+
+    summary_df = pd.DataFrame.from_dict(stats, orient='index', columns=['Value'])
+    summary_df = summary_df.loc[[
+        "Min", "P5", "P10", "P15", "Q1 (25%)", "Mean", "Median",
+        "Q3 (75%)", "P85", "P90", "P95", "Max", "Std"
+    ]]
+    summary_df = summary_df.applymap(lambda x: f"{x:.2%}")
+
+    return fig, summary_df, rows
+
+# Helper function to render one chart block. A fragment: a widget change inside one
+# chart block reruns only that block, not the data loading and the other two charts
+@st.fragment
 def render_multi_company_chart(index: int):
     st.markdown(f"#### 📊 Chart {index+1}: Compare Companies on One Feature")
 
@@ -114,17 +198,10 @@ def render_multi_company_chart(index: int):
     percent_number_input_key = f"percent_number_input_{index}"
     df_form_key = f"plotly_df_form_{index}"
 
-    # Check if 'posisi' is already in datetime format, if not, convert it
-    if not pd.api.types.is_datetime64_any_dtype(df['posisi']):
-        df['posisi'] = pd.to_datetime(df['posisi'], errors='coerce')
-
-    # Date filter
+    # Date filter ('posisi' is already parsed to datetime by the data layer)
     min_date = df['posisi'].min()
     max_date = df['posisi'].max()
 
-    # df_filtered for dataframe that will be changed
-    df_filtered = df.copy()
-
     with st.form(key=date_form_key):
         start_date, end_date = st.date_input(
             f"Select date range for Chart {index+1}",
@@ -155,14 +232,9 @@ def render_multi_company_chart(index: int):
             key=kbmi_key
         )
     
-    if selected_kbmi:
-        valid_companies = (
-            df.loc[df["kbmi_type"].isin(selected_kbmi), "company_name"]
-            .dropna().drop_duplicates().sort_values().tolist()
-        )
-    else:
-        # if no KBMI selected, allow all companies (or set to [] if you prefer)
-        valid_companies = sorted(df["company_name"].dropna().unique().tolist())
+    # Companies available for the selected KBMI (all companies if no KBMI selected),
+    # answered from the precomputed bitmap index instead of rescanning the frame
+    valid_companies = store.filters.options("company_name", kbmi_type=selected_kbmi)
 
     selected_companies = st.multiselect(
         f"Select companies for Chart {index+1}",
@@ -171,16 +243,8 @@ def render_multi_company_chart(index: int):
         key=company_key
     )
 
-    # Add mask for filtered dataframe
-    mask_posisi = ((df_filtered['posisi'].dt.date >= start_date) &
-            (df_filtered['posisi'].dt.date <= end_date)) if (submitted and start_date <= end_date) else True
-    mask_kbmi_type = df_filtered["kbmi_type"].isin(selected_kbmi) if selected_kbmi else True
-    mask_company_name = df_filtered["company_name"].isin(selected_companies) if selected_companies else True
-
-
-    # normalize year to numeric for sorting
-    years_series = pd.to_numeric(df.loc[mask_kbmi_type & mask_company_name, "year"], errors="coerce")
-    valid_years = sorted(years_series.dropna().astype(int).unique().tolist())
+    # Years available for the selected KBMI and companies
+    valid_years = store.filters.options("year", kbmi_type=selected_kbmi, company_name=selected_companies)
 
     col3, col4 = st.columns(2)
 
@@ -196,75 +260,31 @@ def render_multi_company_chart(index: int):
             f"Select quartile for Chart {index+1}",
             options=sorted_quartile,
             default=default_quartile,
+            format_func=lambda q: f"q{q}",
             key=quartile_key
         )
 
-    mask_year = df_filtered["year"].isin(selected_year) if selected_year else True
-    mask_quarter = df_filtered["quarter"].isin(selected_quartile) if selected_quartile else True
-
-    # Filtered data based on company and date range
-    df_filtered = df_filtered[
-        mask_posisi & mask_kbmi_type & mask_company_name & mask_year & mask_quarter
-    ]
-
-    # Plot
-    fig = px.line(
-        df_filtered,
-        x='year_quarter',
-        y=column_to_check,
-        color='company_name',
-        markers=True,
-        title=f"{selected_display} Over Time (Chart {index+1})"
+    # Date range only applies on the rerun where the date form was submitted
+    date_range = (start_date, end_date) if (submitted and start_date <= end_date) else None
+
+    # Served from the figure cache when this chart's inputs did not change
+    cache_key = canonical_key(
+        chart="multi_company",
+        index=index,
+        feature=column_to_check,
+        kbmi=sorted(selected_kbmi),
+        companies=sorted(selected_companies),
+        years=sorted(selected_year),
+        quarters=sorted(selected_quartile),
+        date_range=date_range,
+        data_version=store.version,
     )
-
-    # Compute summary stats from filtered data
-    values = df_filtered[column_to_check].dropna()
-
-    stats = {
-        "Min": values.min(),
-        "P5": np.percentile(values, 5),
-        "P10": np.percentile(values, 10),
-        "P15": np.percentile(values, 15),
-        "Q1 (25%)": values.quantile(0.25),
-        "Mean": values.mean(),
-        "Median": values.median(),
-        "Q3 (75%)": values.quantile(0.75),
-        "P85": np.percentile(values, 85),
-        "P90": np.percentile(values, 90),
-        "P95": np.percentile(values, 95),
-        "Max": values.max(),
-        "Std": values.std()
-    }
-
-    # Add horizontal lines for key stats
-    highlight_stats = {
-        "Mean": ("white", stats["Mean"]),
-        "Median": ("firebrick", stats["Median"]),
-        "Q1 (25%)": ("royalblue", stats["Q1 (25%)"]),
-        "Q3 (75%)": ("green", stats["Q3 (75%)"]),
-    }
-
-    for label, (color, y_val) in highlight_stats.items():
-        fig.add_trace(
-            go.Scatter(
-                x=[df_filtered['year_quarter'].min(), df_filtered['year_quarter'].max()],
-                y=[y_val, y_val],
-                mode="lines",
-                line=dict(color=color, dash="dash"),
-                name=label,
-                hovertemplate=f"{label}: {y_val:.2%}<extra></extra>",
-                showlegend=True
-            )
+    fig, summary_df, rows = figure_cache.get_or_build(
+        cache_key,
+        lambda: build_multi_company_chart(
+            index, column_to_check, selected_display, selected_kbmi,
+            selected_companies, selected_year, selected_quartile, date_range
         )
-
-    # Lock x-axis order
-    fig.update_layout(
-        xaxis_title="Year Quarter",
-        yaxis_title=selected_display,
-        xaxis=dict(categoryorder='array', categoryarray=df_filtered['year_quarter'].unique()),
-        yaxis=dict(tickformat=".2%"),
-        legend_traceorder="normal",
-        template="plotly_white"
     )
 
     # Layout the chart and the stats side by side
@@ -274,23 +294,17 @@ def render_multi_company_chart(index: int):
         st.plotly_chart(fig, use_container_width=True, key=chart_key)
 
     with col6:
-        summary_df = pd.DataFrame.from_dict(stats, orient='index', columns=['Value'])
-        summary_df = summary_df.loc[[
-            "Min", "P5", "P10", "P15", "Q1 (25%)", "Mean", "Median",
-            "Q3 (75%)", "P85", "P90", "P95", "Max", "Std"
-        ]]
-        summary_df = summary_df.applymap(lambda x: f"{x:.2%}")
         st.dataframe(summary_df, use_container_width=True, key=df_key)
 
     # 
 
-    # 1) Add 'between' without changing existing signs
+    # Signs of the form and their screening ops
     SIGN_MAP = {
-        "less": operator.lt,                 # <
-        "less than or same": operator.le,    # <=
+        "less": "lt",                        # <
+        "less than or same": "le",           # <=
         "same": "eq",                        # == with tolerance
-        "more than or same": operator.ge,    # >=
-        "more": operator.gt,                 # >
+        "more than or same": "ge",           # >=
+        "more": "gt",                        # >
         "between": "between"                 # inclusive range [low, high]
     }
     
@@ -344,36 +358,19 @@ def render_multi_company_chart(index: int):
         submitted_rule_form = st.form_submit_button("Apply")
     
         if submitted_rule_form:
-            s = pd.to_numeric(df_filtered[column_to_check], errors="coerce")
-    
-            if SIGN_MAP[sign] == "eq":
-                # existing equality logic (unchanged)
-                threshold = float(number) / 100.0
-                tol = 1e-9
-                mask = np.isfinite(s) & (np.abs(s - threshold) <= tol)
-    
-                rule_text = f"{selected_display} {sign} {number}%"
-    
-            elif SIGN_MAP[sign] == "between":
-                # 3) New 'between' logic (inclusive), still dividing inputs by 100
-                low = float(number_low) / 100.0
-                high = float(number_high) / 100.0
-                if low > high:
-                    low, high = high, low  # swap to be safe
-    
-                mask = np.isfinite(s) & (s >= low) & (s <= high)
+            # Inputs are percents, the data is stored as fractions
+            if SIGN_MAP[sign] == "between":
+                rule = {"feature": column_to_check, "op": "between",
+                        "low": float(number_low) / 100.0, "high": float(number_high) / 100.0}
                 rule_text = f"{selected_display} between {number_low}% and {number_high}%"
-    
             else:
-                # existing comparison logic (unchanged)
-                threshold = float(number) / 100.0
-                cmp_fn = SIGN_MAP[sign]
-                mask = np.isfinite(s) & cmp_fn(s, threshold)
-    
+                rule = {"feature": column_to_check, "op": SIGN_MAP[sign], "value": float(number) / 100.0}
                 rule_text = f"{selected_display} {sign} {number}%"
     
-            valid_count = int(mask.sum())
-            total_used = int(np.isfinite(s).sum())
+            # Evaluated once on the full history (cached by rule), counted on this chart's rows
+            counts = screen(store, {rule_text: rule}).counts(rows).iloc[0]
+            valid_count = int(counts["valid_rows"])
+            total_used = int(counts["total_rows_used"])
             valid_pct = (valid_count / total_used * 100.0) if total_used > 0 else 0.0
     
             result_df = pd.DataFrame([{
@@ -391,4 +388,8 @@ def render_multi_company_chart(index: int):
 st.markdown("## 📈 Multi-Line Comparisons: Company vs Feature Over Time")
 for i in range(3):
     render_multi_company_chart(i)
-    st.markdown("---")
\ No newline at end of file
+    st.markdown("---")
+
+# --- Figure cache counters ---
+with st.sidebar.expander("⚙️ Figure cache"):
+    st.json(figure_cache.stats())
\ No newline at end of file
@@ -9,7 +9,10 @@ from pathlib import Path
 # add "../data" to sys.path
 sys.path.append(str(Path(__file__).resolve().parents[2] / "data"))
 
-from import_data import import_rasio
+from data_store import get_rasio_store
+from derived_metrics import derived_column
+from import_data import import_peer_ranks
+from figure_cache import canonical_key, get_figure_cache
 
 st.markdown("# Overtime Single Bank Persentase")
 
@@ -41,26 +44,20 @@ with st.sidebar:
         """
     )
 
+figure_cache = get_figure_cache()
+
 px.defaults.color_continuous_scale = "Viridis"
 px.defaults.template = "plotly_white"  # or "ggplot2", "seaborn", etc.
 
-# Convert year_quarter to a sortable key (e.g., 2024_q1 -> (2024, 1))
-def quarter_sort_key(yq):
-    year, q = yq.split('_q')
-    return int(year) * 4 + int(q)
-
 # File path for data
 # rasio_file_path = "data/summarized_rasio.xlsx"
 # df_rasio = pd.read_excel(rasio_file_path)
-df_rasio = import_rasio()
-# Placeholder for combined df
-df = df_rasio.copy()
+# Shared, read-only frame (already parsed and sorted by company and quarter), never modify it in place
+store = get_rasio_store()
+df = store.frame
 
 # Sort company names in ascending order
-sorted_companies = sorted(df['company_name'].unique())
-
-# Set the category order explicitly
-df['company_name'] = pd.Categorical(df['company_name'], categories=sorted_companies, ordered=True)
+sorted_companies = store.companies
 
 # Placeholder for list of company name
 list_companies_to_check = sorted_companies
@@ -74,16 +71,96 @@ list_columns_to_check = [
     'net_interest_margin'
 ]
 
-for i in range(1, 4):
+# Views of a line chart: the level, or one of the derived metrics materialized next to
+# the ratios (changes are in percentage points), read like any other column of the store
+VIEWS = {
+    "Level": None,
+    "QoQ change": "qoq",
+    "YoY change": "yoy",
+    "Trailing 4Q mean": "mean_4q",
+    "Trailing 4Q volatility": "std_4q",
+}
+
+# Build the line chart of one feature for one company
+def build_single_company_chart(company, column, start_date, end_date, metric=None):
+    # Level or derived metric column of the feature
+    column = column if metric is None else derived_column(column, metric)
+
+    # Filtered data based on company and date range: the company is one contiguous,
+    # time-ordered block, so the date range is two binary searches inside it
+    df_filtered = store.take(store.company_date_rows(company, start_date, end_date), columns=[column])
+
+    # Plot
+    fig = px.line(
+        df_filtered,
+        x='year_quarter',
+        y=column,
+        title=f"{column} Over Time ({company})",
+        markers=True
+    )
+    fig.update_layout(
+        xaxis_title="Year Quarter",
+        yaxis_title=column,
+        xaxis=dict(categoryorder='array', categoryarray=df_filtered['year_quarter'])
+    )
+    fig.update_yaxes(tickformat=".02%")
+    return fig
+
+# Build the peer position table of one feature for one company: a lookup in the
+# peer rank cube materialized at ingestion, no distribution is computed here
+def build_peer_position_table(company, column, start_date, end_date):
+    peers = import_peer_ranks([column])
+    peers = peers[(peers['company_name'] == company)
+                  & (peers['posisi'] >= pd.Timestamp(start_date))
+                  & (peers['posisi'] <= pd.Timestamp(end_date))].sort_values('posisi')
+
+    table = pd.DataFrame({'Year Quarter': peers['year_quarter']})
+    for scope, label in [('kbmi', 'KBMI'), ('all', 'All Banks')]:
+        rank = peers[f"{column}__rank_{scope}"]
+        count = peers[f"{column}__count_{scope}"]
+        table[f"Rank ({label})"] = [f"{r:.0f} / {n:.0f}" if pd.notna(r) else "-" for r, n in zip(rank, count)]
+        table[f"Percentile ({label})"] = peers[f"{column}__percentile_{scope}"].map(lambda x: f"{x:.0%}" if pd.notna(x) else "-")
+        table[f"Z-Score ({label})"] = peers[f"{column}__zscore_{scope}"].map(lambda x: f"{x:.2f}" if pd.notna(x) else "-")
+    return table.reset_index(drop=True)
+
+# Build the chart of several features for one company
+def build_multi_feature_chart(company_multi, columns_multi, start_date_multi, end_date_multi):
+    # Filtered data based on company and date range (binary searches inside the company block),
+    # already in quarter order
+    df_multi = store.take(store.company_date_rows(company_multi, start_date_multi, end_date_multi), columns=list(columns_multi))
+
+    fig_multi = go.Figure()
+
+    for col in columns_multi:
+        fig_multi.add_trace(
+            go.Scatter(
+                x=df_multi['year_quarter'],
+                y=df_multi[col],
+                mode='lines+markers',
+                name=col
+            )
+        )
+
+    fig_multi.update_layout(
+        title=f"Selected Features Over Time ({company_multi})",
+        xaxis_title="Year Quarter",
+        yaxis_title="Value",
+        template="plotly_white",
+        xaxis=dict(categoryorder='array', categoryarray=df_multi['year_quarter']),
+        legend_title="Feature"
+    )
+    fig_multi.update_yaxes(tickformat=".02%")
+    return fig_multi
+
+# One line chart block. A fragment: a widget change inside it reruns only this block,
+# not the whole page (the data and the other charts are left as they are)
+@st.fragment
+def render_single_company_chart(i: int):
     st.header(f"📈 Line Chart {i}")
 
     date_key = f"date_range_selector_{i}"
 
-    # Check if 'posisi' is already in datetime format, if not, convert it
-    if not pd.api.types.is_datetime64_any_dtype(df['posisi']):
-        df['posisi'] = pd.to_datetime(df['posisi'], errors='coerce')
-
-    # Date filter
+    # Date filter ('posisi' is already parsed to datetime by the data layer)
     min_date = df['posisi'].min()
     max_date = df['posisi'].max()
 
@@ -113,125 +190,98 @@ for i in range(1, 4):
             key=f"feature_select_{i}"
         )
 
-    # Filter data
-    df_filtered = df.copy()
-
-    if submitted and start_date <= end_date:
-        df_filtered = df_filtered[
-            (df_filtered['posisi'].dt.date >= start_date) &
-            (df_filtered['posisi'].dt.date <= end_date)
-        ]
+    view = st.radio(f"View for Chart {i}", list(VIEWS), horizontal=True, key=f"view_select_{i}")
 
-    # Filtered data based on company and date range
-    df_filtered = df_filtered[
-        (df_filtered["company_name"] == company) &
-        (df_filtered["posisi"] >= pd.to_datetime(start_date)) &
-        (df_filtered["posisi"] <= pd.to_datetime(end_date))
-    ]
-    df_filtered['sort_key'] = df_filtered['year_quarter'].apply(quarter_sort_key)
-    df_filtered = df_filtered.sort_values(by='sort_key')
-
-    # Plot
-    fig = px.line(
-        df_filtered,
-        x='year_quarter',
-        y=column,
-        title=f"{column} Over Time ({company})",
-        markers=True
+    # Served from the figure cache when this chart's inputs did not change
+    cache_key = canonical_key(
+        chart="single_company",
+        company=company,
+        feature=column,
+        view=VIEWS[view],
+        date_range=(start_date, end_date),
+        data_version=store.version,
     )
-    fig.update_layout(
-        xaxis_title="Year Quarter",
-        yaxis_title=column,
-        xaxis=dict(categoryorder='array', categoryarray=df_filtered['year_quarter'])
+    fig = figure_cache.get_or_build(
+        cache_key, lambda: build_single_company_chart(company, column, start_date, end_date, VIEWS[view])
     )
-    fig.update_yaxes(tickformat=".02%")
 
     # ✅ Wrap each chart in its own container
     st.plotly_chart(fig, use_container_width=True, key=f"plotly_chart_{i}")
 
+    # Position of the bank among its KBMI peers and all banks (rank 1 = lowest value)
+    with st.expander(f"Peer position of {company}"):
+        peer_table = figure_cache.get_or_build(
+            canonical_key(table="peer_position", company=company, feature=column,
+                          date_range=(start_date, end_date), data_version=store.version),
+            lambda: build_peer_position_table(company, column, start_date, end_date)
+        )
+        st.dataframe(peer_table, use_container_width=True, hide_index=True, key=f"peer_table_{i}")
+
+
+for i in range(1, 4):
+    render_single_company_chart(i)
+
 
 # Code for multiple columns, one company
 # --- Section Header ---
 st.header("📊 Multi-Line Chart for One Company")
 
-# Date selection
-# Check if 'posisi' is already in datetime format, if not, convert it
-if not pd.api.types.is_datetime64_any_dtype(df['posisi']):
-    df['posisi'] = pd.to_datetime(df['posisi'], errors='coerce')
-
-# Date filter
-min_date = df['posisi'].min()
-max_date = df['posisi'].max()
-
-with st.form(key=f"date_form_multi_feature"):
-    start_date_multi, end_date_multi = st.date_input(
-        f"Select date range :",
-        value=(min_date, max_date),
-        min_value=min_date,
-        max_value=max_date,
-        key="date_range_selector_multi_feature"
-    )
-    submitted = st.form_submit_button("Apply Date Filter")
+# The multi-feature block, a fragment like the line chart blocks
+@st.fragment
+def render_multi_feature_chart():
+    # Date selection ('posisi' is already parsed to datetime by the data layer)
+    min_date = df['posisi'].min()
+    max_date = df['posisi'].max()
 
-# --- Selection ---
-col1, col2 = st.columns(2)
+    with st.form(key=f"date_form_multi_feature"):
+        start_date_multi, end_date_multi = st.date_input(
+            f"Select date range :",
+            value=(min_date, max_date),
+            min_value=min_date,
+            max_value=max_date,
+            key="date_range_selector_multi_feature"
+        )
+        submitted = st.form_submit_button("Apply Date Filter")
 
-with col1:
-    company_multi = st.selectbox(
-        "Select Company for Multi-Line Chart",
-        list_companies_to_check,
-        index=list_companies_to_check.index(list_companies_to_check[0]) if list_companies_to_check[0] in list_companies_to_check else 0,
-        key="multi_company_select"
-    )
+    # --- Selection ---
+    col1, col2 = st.columns(2)
 
-with col2:
-    columns_multi = st.multiselect(
-        "Select Financial Features",
-        options=list_columns_to_check,
-        default=list_columns_to_check[:3],  # you can change this default list as needed
-        key="multi_feature_select"
-    )
+    with col1:
+        company_multi = st.selectbox(
+            "Select Company for Multi-Line Chart",
+            list_companies_to_check,
+            index=list_companies_to_check.index(list_companies_to_check[0]) if list_companies_to_check[0] in list_companies_to_check else 0,
+            key="multi_company_select"
+        )
 
-# --- Filter & Sort ---
-df_multi = df.copy()
-if submitted and start_date_multi <= end_date_multi:
-    df_multi = df_multi[
-        (df_multi['posisi'].dt.date >= start_date_multi) &
-        (df_multi['posisi'].dt.date <= end_date_multi)
-    ]
-# Filtered data based on company and date range
-df_multi = df_multi[
-    (df_multi["company_name"]== company_multi) &
-    (df_multi["posisi"] >= pd.to_datetime(start_date_multi)) &
-    (df_multi["posisi"] <= pd.to_datetime(end_date_multi))
-]
-df_multi['sort_key'] = df_multi['year_quarter'].apply(quarter_sort_key)
-df_multi = df_multi.sort_values(by='sort_key')
-
-# --- Plot ---
-fig_multi = go.Figure()
-
-for col in columns_multi:
-    fig_multi.add_trace(
-        go.Scatter(
-            x=df_multi['year_quarter'],
-            y=df_multi[col],
-            mode='lines+markers',
-            name=col
+    with col2:
+        columns_multi = st.multiselect(
+            "Select Financial Features",
+            options=list_columns_to_check,
+            default=list_columns_to_check[:3],  # you can change this default list as needed
+            key="multi_feature_select"
         )
+
+    # --- Filter, Sort & Plot ---
+    multi_cache_key = canonical_key(
+        chart="multi_feature",
+        company=company_multi,
+        features=columns_multi,
+        date_range=(start_date_multi, end_date_multi),
+        data_version=store.version,
+    )
+    fig_multi = figure_cache.get_or_build(
+        multi_cache_key,
+        lambda: build_multi_feature_chart(company_multi, columns_multi, start_date_multi, end_date_multi)
     )
 
-fig_multi.update_layout(
-    title=f"Selected Features Over Time ({company_multi})",
-    xaxis_title="Year Quarter",
-    yaxis_title="Value",
-    template="plotly_white",
-    xaxis=dict(categoryorder='array', categoryarray=df_multi['year_quarter']),
-    legend_title="Feature"
-)
-fig_multi.update_yaxes(tickformat=".02%")
+    # --- Show Plot ---
+    st.plotly_chart(fig_multi, use_container_width=True, key="multi_line_chart")
+
+render_multi_feature_chart()
 
-# --- Show Plot ---
-st.plotly_chart(fig_multi, use_container_width=True, key="multi_line_chart")
+st.markdown("---")
 
-st.markdown("---")
\ No newline at end of file
+# --- Figure cache counters ---
+with st.sidebar.expander("⚙️ Figure cache"):
+    st.json(figure_cache.stats())
\ No newline at end of file
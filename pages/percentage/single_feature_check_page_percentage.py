@@ -10,7 +10,8 @@ from pathlib import Path
 # add "../data" to sys.path
 sys.path.append(str(Path(__file__).resolve().parents[2] / "data"))
 
-from import_data import import_rasio
+from data_store import get_rasio_store
+from stats import grouped_box_stats, grouped_histogram, summary_stats
 
 st.markdown("# Single Feature Persentase")
 
@@ -49,18 +50,15 @@ px.defaults.template = "plotly_white"  # or "ggplot2", "seaborn", etc.
 # File path for data
 # rasio_file_path = "data/summarized_rasio.xlsx"
 # df_rasio = pd.read_excel(rasio_file_path)
-df_rasio = import_rasio()
-# Placeholder for combined df
-df = df_rasio.copy()
+# Shared, read-only frame, never modify it in place
+store = get_rasio_store()
+df = store.frame
 
 # Get unique company names
 # companies = df['company_name'].unique()
 
 # Sort company names in ascending order
-sorted_companies = sorted(df['company_name'].unique())
-
-# Set the category order explicitly
-df['company_name'] = pd.Categorical(df['company_name'], categories=sorted_companies, ordered=True)
+sorted_companies = store.companies
 
 # Placeholder for list of features that can be checked
 list_columns_to_check = [
@@ -71,11 +69,7 @@ list_columns_to_check = [
     'net_interest_margin'
 ]
 
-# Check if 'posisi' is already in datetime format, if not, convert it
-if not pd.api.types.is_datetime64_any_dtype(df['posisi']):
-    df['posisi'] = pd.to_datetime(df['posisi'], errors='coerce')
-
-# Date filter
+# Date filter ('posisi' is already parsed to datetime by the data layer)
 min_date = df['posisi'].min()
 max_date = df['posisi'].max()
 
@@ -98,33 +92,66 @@ selected = st.selectbox(
 # --- Use Current Selection for Visuals ---
 column_to_check = selected
 
-df_filtered = df.copy()
-
-if submitted and start_date <= end_date:
-    df_filtered = df_filtered[
-        (df_filtered['posisi'].dt.date >= start_date) &
-        (df_filtered['posisi'].dt.date <= end_date)
-    ]
-
-# Filtered data based on company and date range
-df_filtered = df_filtered[
-    (df_filtered["posisi"] >= pd.to_datetime(start_date)) &
-    (df_filtered["posisi"] <= pd.to_datetime(end_date))
-]
+# Filtered data based on date range: binary search on the sorted posisi index,
+# only the selected rows and the selected feature are copied out of the shared frame
+df_filtered = store.take(store.dates.rows(start_date, end_date), columns=[column_to_check])
 
 # --- Boxplot ---
-fig_box = px.box(
-    df_filtered,
-    x=column_to_check,
-    color='company_name',
-    template="plotly_white",
-    points='outliers',
-    orientation='h',
-    title=f'Boxplot of {column_to_check} by Company Name',
-    category_orders={"company_name": sorted_companies}  # <-- Force the order
+# Box statistics per company computed on the server in one grouped pass, the chart only
+# receives q1/median/q3/whiskers per company plus the outlier points
+box_stats, outlier_codes, outlier_values = grouped_box_stats(
+    df_filtered[column_to_check],
+    df_filtered['company_name'].cat.codes,
+    n_groups=len(sorted_companies)
 )
+box_colors = px.colors.qualitative.Plotly
+
+fig_box = go.Figure()
+
+for i, (code, row) in enumerate(box_stats.iterrows()):
+    company = sorted_companies[code]
+    color = box_colors[i % len(box_colors)]
+    fig_box.add_trace(
+        go.Box(
+            y=[' '],
+            q1=[row['q1']],
+            median=[row['median']],
+            q3=[row['q3']],
+            lowerfence=[row['lowerfence']],
+            upperfence=[row['upperfence']],
+            mean=[row['mean']],
+            name=company,
+            legendgroup=company,
+            offsetgroup=company,
+            alignmentgroup='True',
+            orientation='h',
+            marker_color=color
+        )
+    )
+    company_outliers = outlier_values[outlier_codes == code]
+    if len(company_outliers):
+        fig_box.add_trace(
+            go.Scatter(
+                x=company_outliers,
+                y=[' '] * len(company_outliers),
+                mode='markers',
+                name=company,
+                legendgroup=company,
+                offsetgroup=company,
+                alignmentgroup='True',
+                showlegend=False,
+                marker=dict(color=color, symbol='circle-open'),
+                hovertemplate=f'{company}: %{{x:.2%}}<extra></extra>'
+            )
+        )
+
 fig_box.update_xaxes(tickformat=".02%")
 fig_box.update_layout(
+    template="plotly_white",
+    title=f'Boxplot of {column_to_check} by Company Name',
+    xaxis_title=column_to_check,
+    boxmode='group',
+    scattermode='group',
     legend_title = "Company",
     shapes=[
         dict(
@@ -160,15 +187,30 @@ fig_box.update_layout(
 #     ]
 # )
 
-# Create Plotly stacked histogram
+# Bin on the server: shared bin edges and the per-company counts from one grouped pass,
+# so the chart only receives (companies x bins) bars instead of every row
+edges, company_counts = grouped_histogram(
+    df_filtered[column_to_check],
+    df_filtered['company_name'].cat.codes,
+    n_groups=len(sorted_companies)
+)
+bin_centers = (edges[:-1] + edges[1:]) / 2
+bin_widths = np.diff(edges)
+bin_ranges = np.column_stack([edges[:-1], edges[1:]])
+
+# Create Plotly stacked histogram from the pre-aggregated bars
 fig_go_hist = go.Figure()
 
-for company in sorted_companies:
+for company, counts in zip(sorted_companies, company_counts):
     fig_go_hist.add_trace(
-        go.Histogram(
-            x=df_filtered[df_filtered['company_name'] == company][column_to_check],
+        go.Bar(
+            x=bin_centers,
+            y=counts,
+            width=bin_widths,
+            customdata=bin_ranges,
             name=company,
-            opacity=0.75
+            opacity=0.75,
+            hovertemplate=f'{company}<br>%{{customdata[0]:.2%}} – %{{customdata[1]:.2%}}: %{{y}}<extra></extra>'
         )
     )
 
@@ -197,28 +239,18 @@ fig_go_hist.update_layout(
     legend_traceorder="normal"  # 🔥 keeps legend in trace (loop) order
 )
 
-bins = np.histogram_bin_edges(df_filtered[column_to_check], bins='auto')
-counts = np.histogram(df_filtered[column_to_check], bins=bins)[0]
-max_y = 5*max(counts)/4 
-
-# Compute statistics from the entire dataset
-x_data = df_filtered[column_to_check]
-mean_val = x_data.mean()
-median_val = x_data.median()
-q1 = x_data.quantile(0.25)
-q3 = x_data.quantile(0.75)
-# Compute percentiles
-p5 = x_data.quantile(0.05)
-p15 = x_data.quantile(0.15)
-p85 = x_data.quantile(0.85)
-p95 = x_data.quantile(0.95)
+# Tallest stacked bar, from the same counts
+max_y = 5*max(company_counts.sum(axis=0))/4 
+
+# Compute statistics from the entire dataset (one sort for every percentile)
+x_stats = summary_stats(df_filtered[column_to_check], percentiles=(5, 15, 25, 50, 75, 85, 95))
 
 # Compute key stats
 stats = {
-    "Q1 (25%)": (x_data.quantile(0.25), "royalblue"),
-    "Median (50%)": (x_data.median(), "firebrick"),
-    "Q3 (75%)": (x_data.quantile(0.75), "green"),
-    "Mean": (x_data.mean(), "white"),
+    "Q1 (25%)": (x_stats[25], "royalblue"),
+    "Median (50%)": (x_stats[50], "firebrick"),
+    "Q3 (75%)": (x_stats[75], "green"),
+    "Mean": (x_stats["mean"], "white"),
 }
 
 # Add vertical lines using a secondary y-axis to avoid changing the original y-axis
@@ -250,19 +282,19 @@ fig_go_hist.update_layout(
 )
 
 # Create summary table
-summary_stats = {
+summary_table = {
     'Statistic': [
         'Min', 'P5', 'P15', 'Q1', 
         'Mean', 'Median','Q3',
         'P85', 'P95', 'Max', 'Std Dev'
     ],
     column_to_check: [
-        x_data.min(), p5, p15, q1,
-        mean_val, median_val,  q3,
-        p85, p95, x_data.max(), x_data.std()
+        x_stats["min"], x_stats[5], x_stats[15], x_stats[25],
+        x_stats["mean"], x_stats[50], x_stats[75],
+        x_stats[85], x_stats[95], x_stats["max"], x_stats["std"]
     ]
 }
-summary_df = pd.DataFrame(summary_stats)
+summary_df = pd.DataFrame(summary_table)
 # Convert to percentage format
 summary_df[column_to_check] = summary_df[column_to_check].apply(lambda x: f"{x:.2%}")
 